@@ -0,0 +1,96 @@
+"""Data layer and analytics behind the Point of Sale dashboard."""
+
+from .aggregate import AggregationService
+from .analyses import ANALYSES
+from .approx import DistinctSketches, Refinements, SampleStrata, StratifiedSample
+from .batch import PARTITION_DIMENSIONS, run_batch
+from .bench import compare_reports, run_benchmark
+from .cube import Cube
+from .customers import CustomerIndex
+from .dataset import REQUIRED_COLUMNS, Dataset
+from .discounts import DISCOUNT_EDGES, DiscountHistogram
+from .downsample import (
+    DEFAULT_POINT_BUDGET,
+    DEFAULT_SCATTER_ROW_LIMIT,
+    RESOLUTIONS,
+    bin_2d,
+    bucket_time_series,
+    lttb_time_series,
+)
+from .figures import FigureCache, cached_figure, figure_cache, gauge_figure, px_figure
+from .filters import FILTER_DIMENSIONS, FilterEngine, FilterSpec
+from .ingest import (
+    cached_table_path,
+    cached_upload_path,
+    iter_source_chunks,
+    load_dataset,
+    read_cache,
+    stream_convert,
+)
+from .instrument import Recorder, recording, stage
+from .ranking import RANK_METRICS, ProductRanking
+from .schema import DIMENSIONS, apply_schema, conform
+from .search import HIERARCHY, HierarchyMap, SearchIndex
+from .sql import BACKENDS, SqlEngine, compare_backends
+from .store import AppendStore, append_rows
+from .timeseries import ADDITIVE_MEASURES, TimeSeries
+from .warmup import WarmupJob, WarmupScheduler
+
+__all__ = [
+    'ADDITIVE_MEASURES',
+    'ANALYSES',
+    'BACKENDS',
+    'DEFAULT_POINT_BUDGET',
+    'DEFAULT_SCATTER_ROW_LIMIT',
+    'DIMENSIONS',
+    'DISCOUNT_EDGES',
+    'FILTER_DIMENSIONS',
+    'HIERARCHY',
+    'PARTITION_DIMENSIONS',
+    'RANK_METRICS',
+    'REQUIRED_COLUMNS',
+    'RESOLUTIONS',
+    'AggregationService',
+    'AppendStore',
+    'Cube',
+    'CustomerIndex',
+    'Dataset',
+    'DiscountHistogram',
+    'DistinctSketches',
+    'FigureCache',
+    'FilterEngine',
+    'FilterSpec',
+    'HierarchyMap',
+    'ProductRanking',
+    'Recorder',
+    'Refinements',
+    'SampleStrata',
+    'SearchIndex',
+    'SqlEngine',
+    'StratifiedSample',
+    'TimeSeries',
+    'WarmupJob',
+    'WarmupScheduler',
+    'append_rows',
+    'apply_schema',
+    'bin_2d',
+    'bucket_time_series',
+    'cached_figure',
+    'cached_table_path',
+    'cached_upload_path',
+    'compare_backends',
+    'compare_reports',
+    'conform',
+    'figure_cache',
+    'gauge_figure',
+    'iter_source_chunks',
+    'load_dataset',
+    'lttb_time_series',
+    'px_figure',
+    'read_cache',
+    'recording',
+    'run_batch',
+    'run_benchmark',
+    'stage',
+    'stream_convert',
+]
@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+
+from .cube import MEASURES
+from .filters import FilterSpec
+from .instrument import stage
+from .schema import memory_bytes
+
+# Default memory budget for memoized aggregates, per dataset
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+class AggregationService:
+    """Memoized cube roll-ups shared by every page.
+
+    ``cube`` is anything with a ``rollup(spec, by, measures)`` method and a ``rows``
+    count: a :class:`~pos_analytics.cube.Cube` or a :class:`~pos_analytics.sql.SqlEngine`.
+
+    Results are keyed on ``(filter spec, group keys, measures)`` with the measures in
+    canonical order, so two pages asking for the same aggregate share one result.
+    Results computed from the filtered rows are memoized here too, under a name
+    (see :meth:`computed`).
+    Entries are evicted least-recently-used first once their combined size exceeds
+    ``budget_bytes``.
+
+    Returned frames are shared between callers and must not be modified in place.
+    """
+
+    def __init__(self, cube, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.cube = cube
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(spec=None, by=(), measures=MEASURES):
+        """Canonical cache key for a query."""
+        measures = tuple(measure for measure in MEASURES if measure in measures)
+        return (spec or FilterSpec(), tuple(by), measures)
+
+    def query(self, spec=None, by=(), measures=MEASURES):
+        """Aggregate ``measures`` over the rows matching ``spec``, grouped by ``by``."""
+        key = self.key(spec, by, measures)
+        return self._memoized(
+            key, f"aggregate by {', '.join(by) or 'total'}", lambda: self.cube.rollup(*key), self.cube.rows
+        )
+
+    def computed(self, name, spec, compute):
+        """``compute()``, memoized as ``name`` for ``spec`` alongside the roll-ups.
+
+        For results that are read off the rows rather than the cube (e.g. binned
+        scatter plots); they share the roll-ups' budget and are dropped on append.
+        """
+        return self._memoized((name, spec or FilterSpec()), name, compute)
+
+    def _memoized(self, key, name, compute, rows=None):
+        with stage(name) as info:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    info.update(cached=True, rows_out=len(entry[0]))
+                    return entry[0]
+                self.misses += 1
+
+            result = compute()
+            size = memory_bytes(result)
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (result, size)
+                    self._bytes += size
+                    self._evict()
+            info.update(cached=False, rows=rows, rows_out=len(result))
+            return result
+
+    def extended(self, cube):
+        """A new service over an extended cube, keeping the counters but no results."""
+        service = AggregationService(cube, self.budget_bytes)
+        service.hits, service.misses, service.evictions = self.hits, self.misses, self.evictions
+        return service
+
+    def stats(self):
+        """Hit, miss and eviction counts plus the current cache footprint."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self._bytes > self.budget_bytes and len(self._entries) > 1:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
@@ -0,0 +1,262 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .approx import DEFAULT_SAMPLE_SIZE
+from .cube import DISCOUNT_KEY
+from .discounts import DISCOUNT_EDGES, HISTOGRAM_MEASURES, DiscountHistogram
+from .downsample import bin_2d
+from .filters import FilterSpec
+from .ranking import PRODUCT_KEYS, RANK_METRICS, RANKING_COLUMNS, rank_order
+from .timeseries import ADDITIVE_MEASURES, TimeSeries
+
+# Each analysis takes a Dataset and an optional FilterSpec (None means every row) and
+# returns a DataFrame. Results may be shared with the aggregation cache, so callers
+# derive new frames instead of editing them.
+
+# Columns shown in the top/bottom product tables
+ORDER_LINE_COLUMNS = ['category', 'product_name', 'sales', 'profit', 'quantity']
+PRODUCT_MARGIN_COLUMNS = ['category', 'product_name', 'sales', 'profit', 'profit_margin']
+
+
+def kpis(dataset, spec=None):
+    """One row of headline totals: sales, profit, quantity, count and margin in percent."""
+    totals = dataset.aggregates.query(spec, measures=['sales', 'profit', 'quantity', 'count'])
+    total_sales = totals['sales'].iloc[0]
+    total_profit = totals['profit'].iloc[0]
+    return totals.assign(
+        profit_margin_pct=(total_profit / total_sales) * 100 if total_sales != 0 else 0
+    )
+
+
+def kpi_estimates(dataset, spec=None, size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """:func:`kpis` estimated from a stratified sample of ``size`` rows.
+
+    ``count`` is exact; every other column has a ``<column>_ci`` companion holding
+    the half-width of its 95% confidence interval.
+    """
+    sample = dataset.sample(spec, size, seed=seed)
+    estimates = {}
+    for column in ['sales', 'profit', 'quantity']:
+        estimates[column], estimates[f'{column}_ci'] = sample.total(column)
+    estimates['count'] = sample.population
+    margin, margin_ci = sample.ratio('profit', 'sales')
+    estimates['profit_margin_pct'] = margin * 100
+    estimates['profit_margin_pct_ci'] = margin_ci * 100
+    return pd.DataFrame({column: [value] for column, value in estimates.items()})
+
+
+def distinct_counts(dataset, spec=None, columns='customer,product_name'):
+    """Distinct values of each of the comma-separated ``columns`` in the matching rows."""
+    rows = dataset.filters.positions(spec or FilterSpec())
+    counts = {}
+    for column in _columns(columns):
+        codes = dataset.frame[column].cat.codes.to_numpy()
+        codes = codes if rows is None else codes[rows]
+        counts[column] = int(np.count_nonzero(np.bincount(codes[codes >= 0])))
+    return pd.DataFrame({column: [value] for column, value in counts.items()})
+
+
+def distinct_count_estimates(dataset, spec=None, columns='customer,product_name'):
+    """:func:`distinct_counts` estimated from the dataset's HyperLogLog sketches.
+
+    ``<column>_error`` holds the relative standard error of each estimate. Columns
+    that are not sketched, or filters on dimensions the sketches are not
+    partitioned by, are counted exactly (error 0).
+    """
+    sketches = dataset.sketches
+    estimates = {}
+    for column in _columns(columns):
+        estimate = sketches.estimate(spec, column, dataset.filters) if column in sketches.columns else None
+        if estimate is None:
+            estimates[column] = distinct_counts(dataset, spec, column)[column].iloc[0]
+            estimates[f'{column}_error'] = 0.0
+        else:
+            estimates[column] = round(estimate)
+            estimates[f'{column}_error'] = sketches.relative_error
+    return pd.DataFrame({column: [value] for column, value in estimates.items()})
+
+
+def region_sales(dataset, spec=None):
+    """Total sales per region."""
+    return dataset.aggregates.query(spec, ['region'], ['sales'])
+
+
+def region_profit_margin(dataset, spec=None):
+    """Mean profit margin per region."""
+    return dataset.aggregates.query(spec, ['region'], ['profit_margin'])
+
+
+def category_sales_profit(dataset, spec=None):
+    """Total sales and profit per product category."""
+    return dataset.aggregates.query(spec, ['category'], ['sales', 'profit'])
+
+
+def product_margins(dataset, spec=None):
+    """Sales, profit and mean profit margin per (category, product)."""
+    return dataset.aggregates.query(spec, ['category', 'product_name'], ['sales', 'profit', 'profit_margin'])
+
+
+def product_margin_extremes(dataset, spec=None, n=5, bottom=False):
+    """The ``n`` products with the highest (or, with ``bottom``, lowest) profit margin."""
+    return product_rankings(dataset, spec, 'profit_margin', n, bottom)[PRODUCT_MARGIN_COLUMNS]
+
+
+def product_rankings(dataset, spec=None, metric='sales', n=5, bottom=False):
+    """The ``n`` products with the highest (or lowest) total sales, profit or quantity,
+    mean profit margin or turnover (sales per unit).
+
+    Filters on category, subcategory or product alone are answered from the
+    dataset's sorted product ranking without touching the rows; other filters roll
+    the matching rows up per product first.
+    """
+    if metric not in RANK_METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; choose from {', '.join(RANK_METRICS)}")
+    ranking = dataset.rankings
+    if ranking.covers(spec):
+        return ranking.top(metric, n, bottom, spec)
+    totals = dataset.aggregates.query(spec, PRODUCT_KEYS, ['sales', 'profit', 'quantity', 'profit_margin'])
+    totals = totals.assign(turnover=totals['sales'] / totals['quantity'])
+    totals = totals[totals[metric].notna()]
+    order = rank_order(totals[metric].to_numpy(), ranking.ids_of(totals), bottom)
+    return totals.iloc[order[:n]][RANKING_COLUMNS].reset_index(drop=True)
+
+
+def yearly_category_trend(dataset, spec=None):
+    """Sales and profit per (year, category)."""
+    return dataset.aggregates.query(spec, ['year', 'category'], ['sales', 'profit'])
+
+
+def daily_sales(dataset, spec=None):
+    """Total sales per calendar day."""
+    return dataset.aggregates.query(spec, ['day'], ['sales'])
+
+
+def sales_trend(dataset, spec=None, metric='sales', window=7, by=''):
+    """Daily ``metric`` with a ``window``-day rolling sum and mean and the running total.
+
+    ``by`` names comma-separated dimensions to split the series by, e.g. ``region``.
+    Days without sales count as zero.
+    """
+    return time_series(dataset, spec, metric, by).trend(window)
+
+
+def period_over_period(dataset, spec=None, metric='sales', freq='M', by=''):
+    """``metric`` per day, week, month, quarter or year (``freq`` D, W, M, Q or Y),
+    with the change on the previous period and on the same period a year earlier."""
+    return time_series(dataset, spec, metric, by).periods(freq)
+
+
+def time_series(dataset, spec=None, metric='sales', by=''):
+    """A :class:`TimeSeries` of daily ``metric`` built from the day roll-up."""
+    if metric not in ADDITIVE_MEASURES:
+        raise ValueError(f"Unknown metric {metric!r}; choose from {', '.join(ADDITIVE_MEASURES)}")
+    by = _columns(by)
+    daily = dataset.aggregates.query(spec, ['day'] + by, [metric])
+    return TimeSeries(daily, metric, by)
+
+
+def hourly_sales(dataset, spec=None):
+    """Total sales per hour of the day."""
+    return dataset.aggregates.query(spec, ['hour'], ['sales'])
+
+
+def order_line_extremes(dataset, spec=None, metric='sales', n=5, bottom=False):
+    """The ``n`` order lines with the highest (or lowest) ``metric``.
+
+    This ranks single rows; :func:`product_rankings` ranks products by their totals.
+    """
+    rows = dataset.frame if spec is None else dataset.filters.select(spec)
+    pick = rows.nsmallest if bottom else rows.nlargest
+    return pick(n, metric)[ORDER_LINE_COLUMNS]
+
+
+def top_customers(dataset, spec=None, metric='profit', n=5):
+    """The ``n`` customers with the highest total ``metric``.
+
+    Unfiltered, this reads the customer index's lifetime totals instead of the rows.
+    """
+    if spec is None or spec == FilterSpec():
+        return dataset.customers.top(metric, n)
+    rows = dataset.filters.select(spec)
+    return rows.groupby('customer', observed=True)[metric].sum().nlargest(n).reset_index()
+
+
+def inventory_turnover(dataset, spec=None):
+    """Sales, profit and quantity per category, with turnover rate = sales / quantity."""
+    turnover = dataset.aggregates.query(spec, ['category'], ['sales', 'profit', 'quantity'])
+    return turnover.assign(turnover_rate=turnover['sales'] / turnover['quantity'])
+
+
+def discount_impact(dataset, spec=None):
+    """Total sales and profit per discount level."""
+    return dataset.aggregates.query(spec, ['discount'], ['sales', 'profit'])
+
+
+def discount_ranges(dataset, spec=None, edges=DISCOUNT_EDGES, by=''):
+    """Sales, profit, mean profit margin and row count per discount range.
+
+    ``edges`` are whole percents (a comma-separated string on the command line).
+    Ranges are closed on the right, except the first, which also holds its lower
+    edge, so undiscounted rows are counted. They are merged from the per-percent
+    histogram, so new edges never rescan the rows.
+    """
+    return discount_histogram(dataset, spec, by).rebin(edges)
+
+
+def discount_product_margins(dataset, spec=None):
+    """Sales, profit and mean profit margin per (category, product, discount)."""
+    levels = discount_histogram(dataset, spec, ['category', 'product_name']).levels()
+    return levels[['category', 'product_name', 'discount', 'sales', 'profit', 'profit_margin']]
+
+
+def discount_margin_bins(dataset, spec=None, bins=50):
+    """Sales and row count per discount x profit margin cell (see :func:`bin_2d`).
+
+    Binned from the matching rows once per filter state, then shared from the
+    aggregation cache until the dataset changes.
+    """
+    def compute():
+        rows = dataset.filters.positions(spec or FilterSpec())
+        columns = dataset.frame[['discount', 'profit_margin', 'sales']]
+        return bin_2d(columns if rows is None else columns.take(rows), 'discount', 'profit_margin', 'sales', bins)
+
+    return dataset.aggregates.computed(f'discount_margin_bins:{bins}', spec, compute)
+
+
+def discount_histogram(dataset, spec=None, by=''):
+    """A :class:`DiscountHistogram` of the rows matching ``spec``, per ``by`` group."""
+    by = _columns(by)
+    rollup = dataset.aggregates.query(spec, by + [DISCOUNT_KEY], HISTOGRAM_MEASURES)
+    return DiscountHistogram(rollup, by)
+
+
+def write_table(frame, output, fmt):
+    """Write ``frame`` as CSV, Parquet or JSON records to ``output`` (``-`` is stdout)."""
+    if fmt == 'parquet':
+        frame.to_parquet(output, index=False)
+    elif fmt == 'json':
+        frame.to_json(sys.stdout if output == '-' else output, orient='records', date_format='iso')
+    else:
+        frame.to_csv(sys.stdout if output == '-' else output, index=False)
+
+
+def _columns(names):
+    # Column names given as a comma-separated string (as on the command line) or a list
+    if isinstance(names, str):
+        return [name.strip() for name in names.split(',') if name.strip()]
+    return list(names)
+
+
+# Analyses runnable by name, e.g. from the command line
+ANALYSES = {
+    function.__name__: function
+    for function in [
+        kpis, kpi_estimates, distinct_counts, distinct_count_estimates, region_sales,
+        region_profit_margin, category_sales_profit, product_margins, product_margin_extremes,
+        product_rankings, yearly_category_trend, daily_sales, sales_trend, period_over_period,
+        hourly_sales, order_line_extremes, top_customers, inventory_turnover, discount_impact,
+        discount_ranges, discount_product_margins, discount_margin_bins,
+    ]
+}
@@ -0,0 +1,481 @@
+import numpy as np
+import pandas as pd
+
+from .filters import FilterSpec
+from .warmup import WarmupScheduler
+
+# HyperLogLog precision: 2**12 registers per sketch, about 1.6% standard error
+DEFAULT_PRECISION = 12
+
+# Columns whose distinct values are sketched, and the dimensions rows are
+# partitioned by (besides the order month). Filters on other dimensions are
+# answered exactly.
+SKETCH_COLUMNS = ['customer', 'product_name']
+SKETCH_PARTITIONS = ['region', 'category', 'segment']
+
+# Rows drawn by default for an estimate, and the strata they are drawn from
+DEFAULT_SAMPLE_SIZE = 20_000
+SAMPLE_STRATA = ['region', 'category']
+
+# Two-sided 95% normal quantile used for confidence intervals
+Z_95 = 1.959964
+
+# Exact results kept by a Refinements store
+DEFAULT_MAX_REFINEMENTS = 64
+
+
+class DistinctSketches:
+    """HyperLogLog sketches of distinct values per month and coarse dimension.
+
+    Rows are partitioned by order month and the ``SKETCH_PARTITIONS`` dimensions,
+    and each partition keeps one sketch per sketched column. A distinct count for a
+    filter spec merges the sketches of the partitions it covers (a register-wise
+    max), so its cost depends on the number of partitions, not rows. Sketches are
+    also kept merged per month and per partition over all months, which answer
+    specs without a selection or without a date cut. Months cut by the date range
+    are sketched from their matching rows on the fly.
+    """
+
+    def __init__(self, frame, columns=SKETCH_COLUMNS, precision=DEFAULT_PRECISION):
+        self.frame = frame
+        self.columns = list(columns)
+        self.precision = precision
+        self._ids = {}
+        self._keys = np.empty((0, 1 + len(SKETCH_PARTITIONS)), dtype=np.int64)
+        self._registers = {column: np.zeros((0, 1 << precision), dtype=np.uint8) for column in self.columns}
+        self._hashes = {}
+        self._first = np.empty(0, dtype=np.int64)
+        self._last = np.empty(0, dtype=np.int64)
+        self._add(frame, 0)
+        self._summarize()
+
+    def extended(self, frame, start):
+        """New sketches for ``frame``, whose rows from ``start`` on were just appended."""
+        sketches = DistinctSketches.__new__(DistinctSketches)
+        sketches.frame = frame
+        sketches.columns = self.columns
+        sketches.precision = self.precision
+        sketches._ids = dict(self._ids)
+        sketches._keys = self._keys
+        sketches._registers = {column: registers.copy() for column, registers in self._registers.items()}
+        sketches._hashes = dict(self._hashes)
+        sketches._first = self._first
+        sketches._last = self._last
+        sketches._add(frame, start)
+        sketches._summarize()
+        return sketches
+
+    def covers(self, spec):
+        """Whether ``spec`` filters only on dimensions the rows are partitioned by."""
+        return spec is None or all(dimension in SKETCH_PARTITIONS for dimension, _ in spec.selections)
+
+    def estimate(self, spec, column, filters):
+        """Estimated distinct values of ``column`` among the rows matching ``spec``.
+
+        Returns ``None`` when ``spec`` filters on a dimension the rows are not
+        partitioned by. ``filters`` (the dataset's filter engine) finds the rows of
+        months the date range only partly covers.
+        """
+        if not self.covers(spec):
+            return None
+        spec = spec or FilterSpec()
+        # Months wholly inside the date range, and months it only cuts
+        inside = np.ones(len(self._months), dtype=bool)
+        overlaps = inside.copy()
+        if spec.start is not None:
+            inside &= self._month_first >= spec.start
+            overlaps &= self._month_last >= spec.start
+        if spec.end is not None:
+            inside &= self._month_last <= spec.end
+            overlaps &= self._month_first <= spec.end
+        edges = self._months[overlaps & ~inside]
+
+        if not any(spec.selected(dimension) for dimension in SKETCH_PARTITIONS):
+            # Every partition of a month is covered: the month's merged sketch stands in
+            merged = self._monthly[column][inside].max(axis=0, initial=0)
+        elif inside.all():
+            # Every month is covered: the partitions' sketches merged over months do
+            merged = self._pooled[column][self._matched(spec, self._partitions)].max(axis=0, initial=0)
+        else:
+            covered = self._matched(spec, self._keys[:, 1:]) & inside[self._month_index]
+            merged = self._registers[column][covered].max(axis=0, initial=0)
+
+        for period in pd.PeriodIndex.from_ordinals(edges, freq='M'):
+            edge = FilterSpec(
+                start=max(period.start_time, spec.start or period.start_time),
+                end=min(period.end_time, spec.end or period.end_time),
+                selections=spec.selections,
+            )
+            rows = filters.positions(edge)
+            slots, ranks = self._slots(column, self.frame[column].array.codes[rows])
+            present = slots >= 0
+            np.maximum.at(merged, slots[present], ranks[present])
+        return _hll_estimate(merged)
+
+    def _matched(self, spec, partitions):
+        # Which rows of ``partitions`` (codes of SKETCH_PARTITIONS) the spec selects
+        matched = np.ones(len(partitions), dtype=bool)
+        for position, dimension in enumerate(SKETCH_PARTITIONS):
+            values = spec.selected(dimension)
+            if values:
+                codes = [self._codes[dimension][value] for value in values if value in self._codes[dimension]]
+                matched &= np.isin(partitions[:, position], codes)
+        return matched
+
+    @property
+    def relative_error(self):
+        """Standard error of an estimate, relative to the true count."""
+        return 1.04 / np.sqrt(1 << self.precision)
+
+    def _add(self, frame, start):
+        rows = frame.iloc[start:]
+        if not len(rows):
+            return
+        # One int64 per row combining its month and partition codes, hashed rather
+        # than sorted into partitions
+        combined = rows['order_date'].dt.to_period('M').array.asi8.astype(np.int64)
+        widths = []
+        for dimension in SKETCH_PARTITIONS:
+            width = len(rows[dimension].cat.categories) + 1
+            combined = combined * width + rows[dimension].cat.codes.to_numpy() + 1
+            widths.append(width)
+        inverse, uniques = pd.factorize(combined)
+        parts = []
+        for width in reversed(widths):
+            uniques, codes = np.divmod(uniques, width)
+            parts.append(codes - 1)
+        keys = np.column_stack([uniques] + parts[::-1])
+        ids = np.empty(len(keys), dtype=np.int64)
+        added = []
+        for position, key in enumerate(map(tuple, keys)):
+            if key not in self._ids:
+                self._ids[key] = len(self._ids)
+                added.append(key)
+            ids[position] = self._ids[key]
+        if added:
+            self._keys = np.concatenate([self._keys, np.array(added, dtype=np.int64)])
+        row_ids = ids[inverse]
+        # First and last order date seen in each partition
+        dates = rows['order_date'].to_numpy().astype('datetime64[ns]').view(np.int64)
+        first = np.concatenate([self._first, np.full(len(added), np.iinfo(np.int64).max)])
+        last = np.concatenate([self._last, np.full(len(added), np.iinfo(np.int64).min)])
+        np.minimum.at(first, row_ids, dates)
+        np.maximum.at(last, row_ids, dates)
+        self._first, self._last = first, last
+        width = 1 << self.precision
+        for column in self.columns:
+            registers = self._registers[column]
+            if added:
+                registers = np.concatenate([registers, np.zeros((len(added), width), dtype=np.uint8)])
+            slots, ranks = self._slots(column, rows[column].array.codes)
+            present = slots >= 0
+            flat = registers.reshape(-1)
+            np.maximum.at(flat, row_ids[present] * width + slots[present], ranks[present])
+            self._registers[column] = registers
+
+    def _summarize(self):
+        # Sketches merged per month and per partition over all months, with the
+        # first and last order date of each month, so common filter states read a
+        # handful of sketches
+        self._months, self._month_index = np.unique(self._keys[:, 0], return_inverse=True)
+        self._month_index = self._month_index.reshape(-1)
+        first = np.full(len(self._months), np.iinfo(np.int64).max)
+        last = np.full(len(self._months), np.iinfo(np.int64).min)
+        np.minimum.at(first, self._month_index, self._first)
+        np.maximum.at(last, self._month_index, self._last)
+        self._month_first = first.view('datetime64[ns]')
+        self._month_last = last.view('datetime64[ns]')
+        self._codes = {
+            dimension: {value: code for code, value in enumerate(self.frame[dimension].cat.categories)}
+            for dimension in SKETCH_PARTITIONS
+        }
+        self._partitions, partition_index = np.unique(self._keys[:, 1:], axis=0, return_inverse=True)
+        self._monthly = {}
+        self._pooled = {}
+        for column, registers in self._registers.items():
+            self._monthly[column] = _merge_rows(registers, self._month_index, len(self._months))
+            self._pooled[column] = _merge_rows(registers, partition_index.reshape(-1), len(self._partitions))
+
+    def _slots(self, column, codes):
+        # Register and rank of each code's hash; codes of missing values get slot -1.
+        # Hashes are computed once per category and reused until categories are added.
+        table = self._hashes.get(column)
+        categories = len(self.frame[column].cat.categories)
+        if table is None or len(table[0]) < categories:
+            hashes = _mix(np.arange(categories, dtype=np.uint64))
+            bits = 64 - self.precision
+            rest = hashes & np.uint64((1 << bits) - 1)
+            table = (
+                (hashes >> np.uint64(bits)).astype(np.int64),
+                (bits - _bit_length(rest) + 1).astype(np.uint8),
+            )
+            self._hashes[column] = table
+        slots, ranks = table
+        present = codes >= 0
+        safe = np.where(present, codes, 0)
+        return np.where(present, slots[safe], -1), ranks[safe]
+
+
+class SampleStrata:
+    """Rows grouped by stratum, each stratum in a fixed random order.
+
+    Built once per dataset and set of ``strata`` columns. Every row gets a random
+    priority when it is added, and rows are kept sorted by (stratum, priority), so
+    the first ``n`` rows of a stratum (or the first ``n`` of its rows matching a
+    filter) are a uniform random sample of it. Drawing a sample then costs a slice
+    per stratum, or one pass over the matching rows, instead of a sort.
+    """
+
+    def __init__(self, frame, strata=SAMPLE_STRATA, seed=0):
+        self.frame = frame
+        self.strata = list(strata)
+        self._rng = np.random.default_rng(seed)
+        self._ids = {}
+        self._order = np.empty(0, dtype=np.int64)
+        # Sorted (stratum id << 32 | random priority) of each row in ``_order``
+        self._keys = np.empty(0, dtype=np.int64)
+        self._sizes = np.empty(0, dtype=np.int64)
+        # The same keys in row order, for drawing from filtered rows
+        self._row_keys = np.empty(0, dtype=np.int64)
+        self._add(frame, 0)
+
+    def extended(self, frame, start):
+        """New strata for ``frame``, whose rows from ``start`` on were just appended."""
+        strata = SampleStrata.__new__(SampleStrata)
+        strata.frame = frame
+        strata.strata = self.strata
+        strata._rng = self._rng
+        strata._ids = dict(self._ids)
+        strata._order = self._order
+        strata._keys = self._keys
+        strata._sizes = self._sizes
+        strata._row_keys = self._row_keys
+        strata._add(frame, start)
+        return strata
+
+    def draw(self, rows=None, size=DEFAULT_SAMPLE_SIZE):
+        """Sampled positions, and the row count and rows drawn per stratum.
+
+        ``rows`` (positions, ``None`` for every row) limits the population. Strata
+        without matching rows are left out; the positions are grouped by stratum in
+        the order of the per-stratum arrays.
+        """
+        if rows is None:
+            counts = self._sizes
+            picked = _allocate(counts, size)
+            # Each stratum's first rows in priority order
+            ranks = np.arange(picked.sum()) - np.repeat(np.cumsum(picked) - picked, picked)
+            positions = self._order[np.repeat(np.cumsum(counts) - counts, picked) + ranks]
+        else:
+            keys = self._row_keys[rows]
+            counts = np.bincount(keys >> 32, minlength=len(self._ids))
+            picked = _allocate(counts, size)
+            positions = self._lowest(rows, keys, counts, picked)
+        present = counts > 0
+        return positions, counts[present], picked[present]
+
+    def _lowest(self, rows, keys, counts, picked):
+        # The ``picked`` lowest-priority rows of each stratum, grouped by stratum.
+        # Only rows under a priority cutoff a little above the expected share are
+        # sorted; a stratum the cutoff leaves short is retried with every row.
+        slack = picked + 4 * np.sqrt(picked) + 8
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cutoff = np.minimum(slack / counts, 1.0) * float(1 << 32)
+        strata = keys >> 32
+        kept = np.flatnonzero((keys & 0xFFFFFFFF) < cutoff[strata])
+        short = np.bincount(strata[kept], minlength=len(counts)) < picked
+        if short.any():
+            kept = np.flatnonzero((keys & 0xFFFFFFFF) < np.where(short, np.inf, cutoff)[strata])
+        kept = kept[np.argsort(keys[kept], kind='stable')]
+        found = np.bincount(strata[kept], minlength=len(counts))
+        ranks = np.arange(len(kept)) - (np.cumsum(found) - found)[strata[kept]]
+        return np.asarray(rows)[kept[ranks < picked[strata[kept]]]]
+
+    def _add(self, frame, start):
+        rows = frame.iloc[start:]
+        if not len(rows):
+            return
+        ids = _stratum_ids(rows, self.strata, self._ids)
+        keys = (ids << 32) | self._rng.integers(0, 1 << 32, len(rows), dtype=np.int64)
+        self._row_keys = np.concatenate([self._row_keys, keys])
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        at = np.searchsorted(self._keys, keys, side='right')
+        self._order = np.insert(self._order, at, order + start)
+        self._keys = np.insert(self._keys, at, keys)
+        sizes = np.bincount(ids, minlength=len(self._ids))
+        sizes[:len(self._sizes)] += self._sizes
+        self._sizes = sizes
+
+
+class StratifiedSample:
+    """A random sample of rows drawn separately from each stratum.
+
+    Each stratum (a combination of the ``strata`` columns) gets a share of ``size``
+    in proportion to its row count, and at least two rows, so small strata are
+    always represented. Totals are estimated stratum by stratum and come with 95%
+    confidence intervals. Rows are drawn from a :class:`SampleStrata`.
+    """
+
+    def __init__(self, strata, rows=None, size=DEFAULT_SAMPLE_SIZE):
+        positions, counts, picked = strata.draw(rows, size)
+        self.frame = strata.frame
+        self.strata = strata.strata
+        self.population = int(counts.sum())
+        # Grouped by stratum; ``rows`` puts them back in dataset order
+        self.positions = positions
+        self._starts = np.cumsum(picked) - picked
+        self._sizes = counts.astype(np.float64)
+        self._picked = picked.astype(np.float64)
+        self._rows = None
+
+    @property
+    def rows(self):
+        """The sampled rows, in dataset order."""
+        if self._rows is None:
+            self._rows = self.frame.take(np.sort(self.positions))
+        return self._rows
+
+    def _values(self, column):
+        return self.frame[column].to_numpy()[self.positions].astype(np.float64, copy=False)
+
+    def total(self, column):
+        """Estimated total of ``column`` over the population and its 95% half-width."""
+        return self._total(self._values(column))
+
+    def ratio(self, numerator, denominator):
+        """Estimated ratio of two population totals and its 95% half-width."""
+        y = self._values(numerator)
+        x = self._values(denominator)
+        total_y, _ = self._total(y)
+        total_x, _ = self._total(x)
+        if not total_x:
+            return 0.0, 0.0
+        ratio = total_y / total_x
+        _, residual = self._total(y - ratio * x)
+        return ratio, residual / abs(total_x)
+
+    def totals(self, columns):
+        """Estimated totals of ``columns`` with 95% confidence bounds, one row each."""
+        rows = [(column, *self.total(column)) for column in columns]
+        frame = pd.DataFrame(rows, columns=['column', 'estimate', 'margin'])
+        return frame.assign(low=frame['estimate'] - frame['margin'], high=frame['estimate'] + frame['margin'])
+
+    def _total(self, values):
+        if not len(values):
+            return 0.0, 0.0
+        n = self._picked
+        sums = np.add.reduceat(values, self._starts)
+        squares = np.add.reduceat(values * values, self._starts)
+        means = sums / n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variances = np.where(n > 1, (squares - n * means * means) / (n - 1), 0.0)
+        sizes = self._sizes
+        variance = np.sum(sizes * sizes * (1 - n / sizes) * np.maximum(variances, 0) / n)
+        return float(np.sum(sizes * means)), float(Z_95 * np.sqrt(variance))
+
+
+class Refinements:
+    """Exact results computed in the background to replace estimates shown meanwhile.
+
+    Each key's computation runs once on a worker thread of its own scheduler, so
+    refinements never queue behind page warm-ups. A result is kept on its job, so
+    the last ``max_results`` jobs and their results are evicted together.
+    """
+
+    def __init__(self, max_results=DEFAULT_MAX_REFINEMENTS):
+        self.max_results = max_results
+        self._scheduler = WarmupScheduler(max_jobs=max_results)
+
+    def get(self, key, compute):
+        """``(result, True)`` when ``key`` is refined, else ``(None, False)``.
+
+        A key not yet refined, or whose result was evicted, has ``compute`` started
+        in the background. If that computation failed, it is run again here so the
+        error surfaces.
+        """
+        job = self._scheduler.submit(key, [('refine', lambda job: compute())])
+        if job.errors:
+            return compute(), True
+        if 'refine' not in job.results:
+            # Still running, or cancelled by an eviction before it ran
+            return None, False
+        return job.results['refine'], True
+
+    def ready(self, key):
+        """Whether ``key`` has no refinement running: it finished, failed or was evicted.
+
+        Either way the next :meth:`get` returns without waiting on this one.
+        """
+        job = self._scheduler.get(key)
+        return job is None or job.finished is not None
+
+
+# Process-wide store shared by every session
+refinements = Refinements()
+
+
+def _mix(values):
+    # splitmix64 finalizer: spreads consecutive codes over all 64 bits
+    with np.errstate(over='ignore'):
+        values = values + np.uint64(0x9E3779B97F4A7C15)
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+
+def _bit_length(values):
+    # Exact bit lengths of uint64 values, via halves small enough for float64
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+def _hll_estimate(registers):
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        # Linear counting is more accurate while many registers are still empty
+        estimate = m * np.log(m / zeros)
+    return float(estimate)
+
+
+def _merge_rows(registers, groups, count):
+    # Register-wise max of the rows of ``registers`` in each of ``count`` groups
+    order = np.argsort(groups, kind='stable')
+    starts = np.searchsorted(groups[order], np.arange(count))
+    if not len(order):
+        return np.zeros((count, registers.shape[1]), dtype=registers.dtype)
+    return np.maximum.reduceat(registers[order], starts, axis=0)
+
+
+def _allocate(counts, size):
+    # Rows drawn per stratum: a proportional share of ``size``, at least two where
+    # the stratum has them, and everything when ``size`` covers the population
+    total = counts.sum()
+    if size >= total:
+        return counts
+    wanted = np.round(size * counts / max(total, 1)).astype(np.int64)
+    return np.clip(wanted, np.minimum(counts, 2), counts)
+
+
+def _stratum_ids(rows, strata, ids):
+    # Stratum id of each row; ``ids`` maps value combinations to ids and gains
+    # the combinations not seen before
+    combined = np.zeros(len(rows), dtype=np.int64)
+    uniques = []
+    for column in strata:
+        codes, values = pd.factorize(rows[column], use_na_sentinel=True)
+        combined = combined * (len(values) + 1) + codes + 1
+        uniques.append(values)
+    inverse, combinations = pd.factorize(combined)
+    mapped = np.empty(len(combinations), dtype=np.int64)
+    for position, code in enumerate(combinations):
+        key = []
+        for values in reversed(uniques):
+            code, part = divmod(code, len(values) + 1)
+            key.append(None if part == 0 else values[part - 1])
+        mapped[position] = ids.setdefault(tuple(reversed(key)), len(ids))
+    return mapped[inverse]
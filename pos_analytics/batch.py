@@ -0,0 +1,117 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .analyses import ANALYSES, write_table
+from .dataset import Dataset
+from .filters import FilterSpec
+from .ingest import DEFAULT_SHEET
+from .store import STORE_DIR
+
+# Dimensions a batch run may partition by
+PARTITION_DIMENSIONS = ['region', 'state', 'city', 'segment', 'category', 'subcategory']
+
+# File suffix per output format
+SUFFIXES = {'csv': '.csv', 'parquet': '.parquet', 'json': '.json'}
+
+# The dataset each worker process opened in _init_worker
+_worker_dataset = None
+
+
+def run_batch(source_path, dimension, output_dir, analyses=None, workers=None, fmt='parquet',
+              sheet_name=DEFAULT_SHEET, store_dir=STORE_DIR, backend=None, progress=None):
+    """Run analyses for every value of ``dimension`` in a pool of worker processes.
+
+    Each worker opens the source's columnar cache itself. The cache is memory-mapped,
+    so all workers share the same pages instead of receiving pickled copies. Results
+    for partition ``v`` go to ``output_dir/<dimension>=<v>/<analysis>.<fmt>``.
+    ``manifest.json`` in ``output_dir`` records per-partition row counts, timings and
+    files. ``progress(done, total)`` is called as partitions finish. ``backend`` picks
+    the engine answering aggregate queries (see :class:`~pos_analytics.dataset.Dataset`).
+    Returns the manifest.
+    """
+    if dimension not in PARTITION_DIMENSIONS:
+        raise ValueError(f"Cannot partition by {dimension!r}; choose from {', '.join(PARTITION_DIMENSIONS)}")
+    names = list(analyses or ANALYSES)
+    unknown = [name for name in names if name not in ANALYSES]
+    if unknown:
+        raise ValueError(f"Unknown analyses: {', '.join(unknown)}")
+
+    started = time.perf_counter()
+    # Converting (or validating) the cache here means workers only ever read it
+    dataset = Dataset.from_source(source_path, sheet_name, store_dir, backend)
+    values = dataset.options(dimension)
+    if dataset.backend != 'pandas':
+        # Build the SQL engine's files once here rather than in every worker
+        dataset.engine
+    os.makedirs(output_dir, exist_ok=True)
+
+    partitions = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(source_path, sheet_name, store_dir, dataset.backend),
+    ) as pool:
+        futures = [
+            pool.submit(_run_partition, dimension, value, names, output_dir, fmt)
+            for value in values
+        ]
+        for future in as_completed(futures):
+            partitions.append(future.result())
+            if progress is not None:
+                progress(len(partitions), len(futures))
+
+    partitions.sort(key=lambda partition: str(partition['value']))
+    manifest = {
+        'source': source_path,
+        'dimension': dimension,
+        'format': fmt,
+        'analyses': names,
+        'workers': workers or os.cpu_count(),
+        'backend': dataset.backend,
+        'partitions': partitions,
+        'wall_seconds': time.perf_counter() - started,
+        'worker_seconds': sum(partition['seconds'] for partition in partitions),
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+def _init_worker(source_path, sheet_name, store_dir, backend):
+    global _worker_dataset
+    _worker_dataset = Dataset.from_source(source_path, sheet_name, store_dir, backend)
+
+
+def _run_partition(dimension, value, names, output_dir, fmt):
+    dataset = _worker_dataset
+    started = time.perf_counter()
+    spec = FilterSpec.build(**{dimension: [value]})
+    rows = dataset.filters.positions(spec)
+    bundle = os.path.join(output_dir, f'{dimension}={_safe_name(value)}')
+    os.makedirs(bundle, exist_ok=True)
+
+    timings = {}
+    files = []
+    for name in names:
+        began = time.perf_counter()
+        result = ANALYSES[name](dataset, spec)
+        path = os.path.join(bundle, name + SUFFIXES[fmt])
+        write_table(result, path, fmt)
+        timings[name] = time.perf_counter() - began
+        files.append(os.path.relpath(path, output_dir))
+    return {
+        'value': value,
+        'rows': len(dataset) if rows is None else len(rows),
+        'files': files,
+        'seconds': time.perf_counter() - started,
+        'analysis_seconds': timings,
+        'pid': os.getpid(),
+    }
+
+
+def _safe_name(value):
+    # Partition values become directory names, so keep them to portable characters
+    return re.sub(r'[^\w.-]+', '_', str(value)).strip('_') or '_'
@@ -0,0 +1,276 @@
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from .analyses import ANALYSES
+from .cube import Cube
+from .dataset import Dataset
+from .downsample import DEFAULT_POINT_BUDGET, bucket_time_series
+from .figures import figure_cache, gauge_figure, px_figure
+from .filters import FilterEngine, FilterSpec
+from .ingest import stream_convert, write_cache
+
+# Version of the report layout; reports are only compared within one version
+REPORT_FORMAT = 1
+
+# Row counts benchmarked when none are given
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# Sources above this size skip the CSV ingest stage, which would dominate the run
+DEFAULT_INGEST_LIMIT = 1_000_000
+
+# Catalogue shape modelled on superstore.xlsx: 3 categories / 17 subcategories /
+# ~1850 products, 4 regions / 49 states / ~530 cities, 3 segments
+SUBCATEGORIES = {
+    'Furniture': ['Bookcases', 'Chairs', 'Furnishings', 'Tables'],
+    'Office Supplies': ['Appliances', 'Art', 'Binders', 'Envelopes', 'Fasteners', 'Labels', 'Paper',
+                        'Storage', 'Supplies'],
+    'Technology': ['Accessories', 'Copiers', 'Machines', 'Phones'],
+}
+REGIONS = ['Central', 'East', 'South', 'West']
+SEGMENTS = ['Consumer', 'Corporate', 'Home Office']
+PRODUCTS = 1850
+STATES = 49
+CITIES = 530
+
+# Discount levels and how often they occur in the bundled data
+DISCOUNTS = [0.0, 0.1, 0.15, 0.2, 0.3, 0.32, 0.4, 0.45, 0.5, 0.6, 0.7, 0.8]
+DISCOUNT_WEIGHTS = [0.48, 0.0094, 0.0052, 0.366, 0.0227, 0.0027, 0.0206, 0.0011, 0.0066, 0.0138,
+                    0.0418, 0.0301]
+
+
+def generate(rows, seed=0, start='2019-01-01', days=4 * 365):
+    """A synthetic transaction table with the superstore schema and cardinalities.
+
+    Products belong to subcategories and categories, cities to states and regions, so
+    hierarchies stay consistent. Popularity is skewed (a few big cities and
+    best-selling products), the customer count grows with the row count, and rows are
+    in order-date order like an export. The same ``seed`` always gives the same rows.
+    """
+    rng = np.random.default_rng(seed)
+
+    categories = sorted(SUBCATEGORIES)
+    subcategories = sorted(sub for subs in SUBCATEGORIES.values() for sub in subs)
+    sub_category = np.array([
+        categories.index(next(cat for cat, subs in SUBCATEGORIES.items() if sub in subs))
+        for sub in subcategories
+    ])
+    # Zero-padded names sort in code order, so codes double as sorted category codes
+    product_sub = np.sort(rng.integers(0, len(subcategories), PRODUCTS))
+    state_region = np.sort(rng.integers(0, len(REGIONS), STATES))
+    city_state = np.sort(rng.integers(0, STATES, CITIES))
+    customers = int(np.clip(rows ** 0.75, 100, 5_000_000))
+
+    product = _skewed(rng, PRODUCTS, rows, 1.1)
+    city = _skewed(rng, CITIES, rows, 1.3)
+    quantity = np.minimum(rng.geometric(0.27, rows), 14).astype('int8')
+    discount = rng.choice(DISCOUNTS, rows, p=np.array(DISCOUNT_WEIGHTS) / sum(DISCOUNT_WEIGHTS))
+    unit_price = rng.lognormal(3.3, 1.3, PRODUCTS)
+    sales = np.round(unit_price[product] * quantity * (1 - discount), 3)
+    # Margins fall as discounts rise, going negative beyond about 30%
+    profit_margin = np.round(0.3 - 0.9 * discount + rng.normal(0, 0.08, rows), 4)
+
+    def categorical(codes, names):
+        return pd.Categorical.from_codes(codes, categories=names)
+
+    return pd.DataFrame({
+        'order_date': pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, days, rows)), unit='D'),
+        'customer': categorical(rng.integers(0, customers, rows), _names('Customer', customers)),
+        'product_name': categorical(product, _names('Product', PRODUCTS)),
+        'segment': categorical(rng.choice(len(SEGMENTS), rows, p=[0.52, 0.30, 0.18]), SEGMENTS),
+        'category': categorical(sub_category[product_sub[product]], categories),
+        'subcategory': categorical(product_sub[product], subcategories),
+        'region': categorical(state_region[city_state[city]], REGIONS),
+        'city': categorical(city, _names('City', CITIES)),
+        'state': categorical(city_state[city], _names('State', STATES)),
+        'discount': discount,
+        'profit': np.round(sales * profit_margin, 4),
+        'quantity': quantity,
+        'sales': sales,
+        'profit_margin': profit_margin,
+    })
+
+
+def _skewed(rng, n, size, exponent):
+    # Zipf-like popularity over n items, shuffled so popular items are spread out
+    weights = 1 / np.arange(1, n + 1) ** exponent
+    return rng.permutation(n)[rng.choice(n, size, p=weights / weights.sum())]
+
+
+def _names(prefix, count):
+    width = len(str(count - 1))
+    return [f'{prefix} {index:0{width}d}' for index in range(count)]
+
+
+def benchmark_specs(frame):
+    """Representative filter states: a date range, single values and a combination."""
+    end = frame['order_date'].max()
+    top = {
+        column: str(frame[column].value_counts().index[0])
+        for column in ['category', 'region', 'segment', 'product_name']
+    }
+    return {
+        'last_90_days': FilterSpec.build(start=end - pd.Timedelta(days=89), end=end),
+        'category': FilterSpec.build(category=[top['category']]),
+        'region_segment': FilterSpec.build(region=[top['region']], segment=[top['segment']]),
+        'product': FilterSpec.build(product_name=[top['product_name']]),
+        'combined': FilterSpec.build(start=end - pd.Timedelta(days=364), end=end,
+                                     category=[top['category']], region=[top['region']]),
+    }
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, seed=0, repeat=3, ingest_limit=DEFAULT_INGEST_LIMIT,
+                  work_dir=None, progress=None):
+    """Time every stage of the dashboard at each row count and return a report dict.
+
+    Each stage is timed ``repeat`` times and the fastest run is kept. Stages measured
+    cold (``.cold``) start from empty caches; ``.warm`` repeats the same requests.
+    ``progress(message)`` receives a line per stage.
+    """
+    scratch = work_dir or tempfile.mkdtemp(prefix='pos-bench-')
+    os.makedirs(scratch, exist_ok=True)
+    report = {
+        'format': REPORT_FORMAT,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': seed,
+        'repeat': repeat,
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'runs': [],
+    }
+    try:
+        for rows in sizes:
+            report['runs'].append(_benchmark_size(rows, seed, repeat, ingest_limit, scratch, progress))
+    finally:
+        if work_dir is None:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return report
+
+
+def _benchmark_size(rows, seed, repeat, ingest_limit, work_dir, progress):
+    timings = {}
+
+    def timed(stage, function, times=repeat):
+        best = None
+        for _ in range(times):
+            started = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[stage] = best
+        if progress is not None:
+            progress(f'{rows:,} rows: {stage} {best * 1000:,.1f} ms')
+        return result
+
+    frame = timed('generate', lambda: generate(rows, seed), times=1)
+    cache_path = os.path.join(work_dir, f'bench-{rows}.feather')
+    write_cache(frame, cache_path)
+    if rows <= ingest_limit:
+        csv_path = os.path.join(work_dir, f'bench-{rows}.csv')
+        frame.to_csv(csv_path, index=False)
+        timed('ingest', lambda: stream_convert(csv_path, os.path.join(work_dir, 'ingest.feather')), times=1)
+        os.remove(csv_path)
+    del frame
+
+    dataset = timed('load', lambda: Dataset.from_cache(cache_path))
+    frame = dataset.frame
+    specs = benchmark_specs(frame)
+
+    engine = timed('filters.build', lambda: FilterEngine(frame))
+    for name, spec in specs.items():
+        # A fresh engine per repeat keeps the memo out of the cold numbers
+        timed(f'filters.{name}.cold', lambda spec=spec: FilterEngine(frame).select(spec))
+        engine.select(spec)
+        timed(f'filters.{name}.warm', lambda spec=spec: engine.select(spec))
+
+    cube = timed('cube.build', lambda: Cube(frame))
+    dataset.derived('filters', lambda: engine)
+    dataset.derived('cube', lambda: cube)
+    # Built once per dataset, ahead of the first estimate
+    timed('estimates.build', dataset.prepare_estimates, times=1)
+    for name, analysis in ANALYSES.items():
+        for spec_name in [None, 'combined']:
+            spec = None if spec_name is None else specs[spec_name]
+            stage = f"analysis.{name}{'' if spec_name is None else '.' + spec_name}"
+
+            def cold(analysis=analysis, spec=spec):
+                dataset.aggregates.clear()
+                return analysis(dataset, spec)
+
+            timed(stage, cold)
+
+    def figures():
+        return _build_figures(dataset, specs['combined'])
+
+    figure_cache.clear()
+    timed('figures.cold', lambda: (figure_cache.clear(), figures()))
+    timed('figures.warm', figures)
+
+    return {
+        'rows': rows,
+        'cache_bytes': os.path.getsize(cache_path),
+        'memory_bytes': int(frame.memory_usage(deep=True).sum()),
+        'cube_cells': len(cube.cells),
+        'timings': timings,
+    }
+
+
+def _build_figures(dataset, spec):
+    # One figure per chart type the pages draw, from the same aggregates
+    analyses = {name: ANALYSES[name](dataset, spec) for name in ANALYSES}
+    kpis = analyses['kpis']
+    daily, _ = bucket_time_series(analyses['daily_sales'], 'day', 'sales', DEFAULT_POINT_BUDGET)
+    margins = analyses['product_margins']
+    return [
+        *[gauge_figure(kpis[column].iloc[0], column, 'darkblue')
+          for column in ['sales', 'profit', 'quantity', 'profit_margin_pct', 'count']],
+        px_figure('bar', analyses['region_sales'], x='region', y='sales', color='region'),
+        px_figure('scatter', analyses['category_sales_profit'], x='sales', y='profit', color='category',
+                  size='sales'),
+        px_figure('line', analyses['yearly_category_trend'], x='year', y='sales', color='category',
+                  markers=True),
+        px_figure('line', daily, x='day', y='sales', markers=True),
+        px_figure('line', analyses['hourly_sales'], x='hour', y='sales', markers=True),
+        px_figure('bar', analyses['inventory_turnover'], x='category', y='turnover_rate', color='category'),
+        px_figure('scatter', margins, x='profit_margin', y='sales', color='category',
+                  size=margins['sales'].abs(), hover_name='product_name'),
+        px_figure('line', analyses['discount_impact'], x='discount', y=['sales', 'profit'], markers=True),
+        px_figure('bar', analyses['discount_ranges'], x='discount_range', y=['sales', 'profit'],
+                  barmode='group'),
+    ]
+
+
+def compare_reports(baseline, current, tolerance=0.2, min_seconds=0.01):
+    """Stages of ``current`` slower than in ``baseline`` by more than ``tolerance``.
+
+    Returns ``(rows, stage, baseline_seconds, current_seconds)`` tuples. Stages faster
+    than ``min_seconds`` in both reports are ignored as noise.
+    """
+    if baseline.get('format') != current.get('format'):
+        raise ValueError('Reports have different formats and cannot be compared')
+    previous = {run['rows']: run['timings'] for run in baseline['runs']}
+    regressions = []
+    for run in current['runs']:
+        for stage, seconds in run['timings'].items():
+            before = previous.get(run['rows'], {}).get(stage)
+            if before is None or max(before, seconds) < min_seconds or stage == 'generate':
+                continue
+            if seconds > before * (1 + tolerance):
+                regressions.append((run['rows'], stage, before, seconds))
+    return regressions
+
+
+def write_report(report, path):
+    with open(path, 'w') as handle:
+        json.dump(report, handle, indent=2)
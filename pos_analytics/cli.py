@@ -0,0 +1,210 @@
+"""Command-line entry points for the Point of Sale analytics."""
+
+import argparse
+import inspect
+import json
+import os
+import sys
+
+from .analyses import ANALYSES, write_table
+from .batch import PARTITION_DIMENSIONS, run_batch
+from .bench import (
+    DEFAULT_INGEST_LIMIT,
+    DEFAULT_SIZES,
+    benchmark_specs,
+    compare_reports,
+    run_benchmark,
+    write_report,
+)
+from .dataset import Dataset
+from .filters import FILTER_DIMENSIONS, FilterSpec
+from .ingest import DEFAULT_SHEET
+from .sql import BACKENDS, DEFAULT_BACKEND, compare_backends
+from .store import STORE_DIR, append_rows
+
+# Output formats by file suffix; CSV and JSON can also go to standard output
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.json': 'json'}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m pos_analytics', description=__doc__)
+    parser.add_argument('--source', default='superstore.xlsx', help='Base dataset (default: %(default)s)')
+    parser.add_argument('--sheet', default=DEFAULT_SHEET, help='Worksheet of an Excel source')
+    parser.add_argument('--backend', default=DEFAULT_BACKEND, choices=BACKENDS,
+                        help='Engine answering aggregate queries (default: %(default)s, or $POS_BACKEND)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    append = commands.add_parser('append', help='Append new transaction rows to the source')
+    append.add_argument('batches', nargs='+', help='CSV, Excel (.xlsx) or JSON-lines files')
+    append.add_argument('--store-dir', default=STORE_DIR, help='Append store root (default: %(default)s)')
+    append.set_defaults(handler=run_append)
+
+    report = commands.add_parser('report', help='Run one analysis and write its table')
+    report.add_argument('analysis', choices=sorted(ANALYSES), help='Analysis to run')
+    report.add_argument('-o', '--output', default='-', help='Output file, or - for stdout (default)')
+    report.add_argument('--format', choices=sorted(set(FORMATS.values())),
+                        help='Output format (default: from the output suffix, else csv)')
+    report.add_argument('--start', help='First order date to include (inclusive)')
+    report.add_argument('--end', help='Last order date to include (inclusive)')
+    for dimension in FILTER_DIMENSIONS:
+        report.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, action='append',
+                            metavar='VALUE', help=f'Keep only this {dimension} (repeatable)')
+    report.add_argument('--param', action='append', default=[], metavar='NAME=VALUE',
+                        help='Analysis option, e.g. n=10, metric=profit or bottom=true')
+    report.add_argument('--store-dir', default=STORE_DIR, help='Append store root (default: %(default)s)')
+    report.set_defaults(handler=run_report)
+
+    batch = commands.add_parser('batch', help='Run analyses for every region, state, city, ...')
+    batch.add_argument('--by', required=True, choices=PARTITION_DIMENSIONS, help='Dimension to partition by')
+    batch.add_argument('-o', '--output-dir', default='reports', help='Report root (default: %(default)s)')
+    batch.add_argument('--analysis', action='append', choices=sorted(ANALYSES),
+                       help='Analysis to run (repeatable; default: all)')
+    batch.add_argument('--format', default='parquet', choices=sorted(set(FORMATS.values())),
+                       help='Output format (default: %(default)s)')
+    batch.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    batch.add_argument('--store-dir', default=STORE_DIR, help='Append store root (default: %(default)s)')
+    batch.set_defaults(handler=run_batch_command)
+
+    bench = commands.add_parser('bench', help='Time every stage on synthetic data and write a JSON report')
+    bench.add_argument('--rows', type=int, action='append',
+                       help=f"Row count to benchmark (repeatable; default: {', '.join(map(str, DEFAULT_SIZES))})")
+    bench.add_argument('-o', '--output', default='bench.json', help='Report file (default: %(default)s)')
+    bench.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+    bench.add_argument('--repeat', type=int, default=3, help='Runs per stage; the fastest is kept')
+    bench.add_argument('--ingest-limit', type=int, default=DEFAULT_INGEST_LIMIT,
+                       help='Skip the CSV ingest stage above this many rows (default: %(default)s)')
+    bench.add_argument('--compare', metavar='BASELINE', help='Report to compare against; exit 1 on regressions')
+    bench.add_argument('--tolerance', type=float, default=0.2,
+                       help='Allowed slowdown against the baseline (default: %(default)s)')
+    bench.set_defaults(handler=run_bench)
+
+    parity = commands.add_parser('parity', help='Check that a SQL backend gives the same results as pandas')
+    parity.add_argument('--store-dir', default=STORE_DIR, help='Append store root (default: %(default)s)')
+    parity.set_defaults(handler=run_parity)
+    return parser
+
+
+def run_append(args):
+    for path in args.batches:
+        try:
+            entry = append_rows(args.source, path, sheet_name=args.sheet, store_dir=args.store_dir)
+        except (OSError, ValueError) as error:
+            print(f'{path}: rejected: {error}', file=sys.stderr)
+            return 1
+        print(f"{path}: appended {entry['rows']:,} rows as batch {entry['seq']} "
+              f"({len(entry['files'])} month partition(s))")
+    return 0
+
+
+def run_report(args):
+    analysis = ANALYSES[args.analysis]
+    fmt = args.format or FORMATS.get(os.path.splitext(args.output)[1].lower(), 'csv')
+    try:
+        if fmt == 'parquet' and args.output == '-':
+            raise ValueError('Parquet output needs a file name (-o)')
+        params = parse_params(analysis, args.param)
+    except ValueError as error:
+        print(f'{args.analysis}: {error}', file=sys.stderr)
+        return 2
+    spec = FilterSpec.build(
+        start=args.start,
+        end=args.end,
+        **{dimension: getattr(args, dimension) or () for dimension in FILTER_DIMENSIONS},
+    )
+    dataset = Dataset.from_source(args.source, sheet_name=args.sheet, store_dir=args.store_dir,
+                                  backend=args.backend)
+    result = analysis(dataset, spec, **params)
+    write_table(result, args.output, fmt)
+    if args.output != '-':
+        print(f'{args.analysis}: wrote {len(result):,} rows to {args.output}', file=sys.stderr)
+    return 0
+
+
+def run_batch_command(args):
+    def report_progress(done, total):
+        print(f'\r{done:,}/{total:,} partitions', end='', file=sys.stderr, flush=True)
+
+    try:
+        manifest = run_batch(
+            args.source, args.by, args.output_dir, analyses=args.analysis, workers=args.workers,
+            fmt=args.format, sheet_name=args.sheet, store_dir=args.store_dir, backend=args.backend,
+            progress=report_progress,
+        )
+    except (OSError, ValueError) as error:
+        print(f'batch: {error}', file=sys.stderr)
+        return 1
+    partitions = manifest['partitions']
+    slowest = max(partitions, key=lambda partition: partition['seconds'], default=None)
+    print(file=sys.stderr)
+    print(f"{len(partitions):,} {args.by} partitions in {manifest['wall_seconds']:.2f}s wall, "
+          f"{manifest['worker_seconds']:.2f}s in workers ({manifest['workers']} workers)")
+    if slowest is not None:
+        print(f"slowest: {slowest['value']} ({slowest['rows']:,} rows, {slowest['seconds']:.2f}s)")
+    print(f"manifest: {os.path.join(args.output_dir, 'manifest.json')}")
+    return 0
+
+
+def run_bench(args):
+    report = run_benchmark(
+        args.rows or DEFAULT_SIZES, seed=args.seed, repeat=args.repeat, ingest_limit=args.ingest_limit,
+        progress=lambda message: print(message, file=sys.stderr),
+    )
+    write_report(report, args.output)
+    print(f'report: {args.output}')
+    if not args.compare:
+        return 0
+
+    with open(args.compare) as handle:
+        baseline = json.load(handle)
+    regressions = compare_reports(baseline, report, args.tolerance)
+    for rows, stage, before, after in regressions:
+        print(f'REGRESSION {rows:,} rows {stage}: {before * 1000:,.1f} ms -> {after * 1000:,.1f} ms '
+              f'({after / before:.2f}x)')
+    if not regressions:
+        print(f'no stage slower than {args.compare} by more than {args.tolerance:.0%}')
+    return 1 if regressions else 0
+
+
+def run_parity(args):
+    if args.backend == 'pandas':
+        print('parity: choose a SQL backend to check, e.g. --backend sqlite', file=sys.stderr)
+        return 2
+    try:
+        reference = Dataset.from_source(args.source, sheet_name=args.sheet, store_dir=args.store_dir,
+                                        backend='pandas')
+        candidate = Dataset.from_source(args.source, sheet_name=args.sheet, store_dir=args.store_dir,
+                                        backend=args.backend)
+        specs = {'all rows': None, **benchmark_specs(reference.frame)}
+        mismatches = compare_backends(reference, candidate, specs)
+    except (OSError, ValueError) as error:
+        print(f'parity: {error}', file=sys.stderr)
+        return 1
+    for name, spec_name, message in mismatches:
+        print(f'MISMATCH {name} ({spec_name}): {message}')
+    if not mismatches:
+        print(f'{args.backend} matches pandas on {len(ANALYSES)} analyses x {len(specs)} filter states')
+    return 1 if mismatches else 0
+
+
+def parse_params(analysis, pairs):
+    """Turn ``NAME=VALUE`` strings into keyword arguments ``analysis`` accepts."""
+    accepted = inspect.signature(analysis).parameters
+    params = {}
+    for pair in pairs:
+        name, sep, value = pair.partition('=')
+        if not sep or name not in accepted or name in ('dataset', 'spec'):
+            options = ', '.join(list(accepted)[2:]) or 'none'
+            raise ValueError(f'unknown option {pair!r} (options: {options})')
+        default = accepted[name].default
+        if isinstance(default, bool):
+            params[name] = value.lower() in ('1', 'true', 'yes')
+        elif isinstance(default, int):
+            params[name] = int(value)
+        else:
+            params[name] = value
+    return params
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
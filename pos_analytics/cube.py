@@ -0,0 +1,107 @@
+import pandas as pd
+
+from .discounts import discount_codes
+from .filters import FilterEngine
+
+# Finest grain kept by the cube. order_date is truncated to the hour, the finest
+# resolution any page charts.
+GRAIN = [
+    'order_date', 'category', 'subcategory', 'product_name', 'region', 'state', 'city',
+    'segment', 'discount',
+]
+
+# Additive measures stored per cell; means are derived from a sum and ``count``
+SUM_MEASURES = ['sales', 'profit', 'quantity', 'profit_margin']
+MEASURES = ['sales', 'profit', 'quantity', 'count', 'profit_margin']
+
+# Keys derived from order_date, stored on the cells as compact columns when the
+# cube is built so roll-ups group by them without touching the dates again
+TIME_KEYS = {
+    'year': lambda dates: dates.dt.year.astype('int16'),
+    'month': lambda dates: dates.dt.month.astype('int8'),
+    'day': lambda dates: dates.dt.normalize(),
+    'hour': lambda dates: dates.dt.hour.astype('int8'),
+    'weekday': lambda dates: dates.dt.weekday.astype('int8'),
+}
+
+# Each cell also carries its discount as a whole-percent code, the ``discount_pct``
+# key, which discount histograms are rolled up by
+DISCOUNT_KEY = 'discount_pct'
+
+
+class Cube:
+    """Sales, profit, quantity and row counts pre-aggregated at the finest grain.
+
+    Built once per dataset, the cube holds one cell per distinct combination of the
+    ``GRAIN`` columns, so its size is bounded by the catalogue and calendar rather
+    than by the number of transactions. Every page query is a filtered roll-up of
+    these cells.
+
+    ``profit_margin`` is returned as the mean over the underlying rows (the stored
+    sum divided by ``count``), which is what the pages chart. Date filters apply to
+    the hour-truncated order_date, so both bounds resolve to the hour.
+    """
+
+    def __init__(self, frame):
+        self._set_cells(_aggregate_cells(frame), len(frame))
+
+    def extended(self, frame, start):
+        """A new cube for ``frame``, whose rows from ``start`` on were just appended.
+
+        Only the appended rows are aggregated; their cells are then merged into the
+        existing ones, so the cost depends on the cube and batch sizes, not on the
+        length of the history.
+        """
+        delta = _aggregate_cells(frame.iloc[start:])
+        cells = self.cells[GRAIN + SUM_MEASURES + ['count']].astype({
+            column: delta[column].dtype
+            for column in GRAIN
+            if isinstance(delta[column].dtype, pd.CategoricalDtype)
+        })
+        merged = pd.concat([cells, delta], ignore_index=True)
+        merged = merged.groupby(GRAIN, observed=True, sort=True, dropna=False)[
+            SUM_MEASURES + ['count']
+        ].sum().reset_index()
+        cube = Cube.__new__(Cube)
+        cube._set_cells(merged, self.rows + len(frame) - start)
+        return cube
+
+    def _set_cells(self, cells, rows):
+        self.cells = cells.assign(
+            **{key: derive(cells['order_date']) for key, derive in TIME_KEYS.items()},
+            **{DISCOUNT_KEY: discount_codes(cells['discount'])},
+        )
+        self.rows = rows
+        self.filters = FilterEngine(self.cells)
+
+    def rollup(self, spec=None, by=(), measures=MEASURES):
+        """Aggregate the cells matching ``spec`` by the ``by`` keys.
+
+        ``by`` may name any grain column, one of the derived time keys (year, month,
+        day, hour, weekday) or ``discount_pct``. With no keys the result is a single
+        row of grand totals.
+        """
+        cells = self.cells if spec is None else self.filters.select(spec)
+        by = list(by)
+        # count is always carried along; the profit_margin mean needs it
+        needed = [measure for measure in SUM_MEASURES if measure in measures] + ['count']
+
+        if by:
+            result = cells.groupby(by, observed=True, sort=True)[needed].sum().reset_index()
+        else:
+            result = pd.DataFrame({measure: [cells[measure].sum()] for measure in needed})
+
+        if 'profit_margin' in measures:
+            result['profit_margin'] = result['profit_margin'] / result['count']
+        return result[by + [measure for measure in MEASURES if measure in measures]]
+
+
+def _aggregate_cells(frame):
+    dates = frame['order_date'].dt.floor('h')
+    keys = [dates if column == 'order_date' else frame[column] for column in GRAIN]
+    # Widen downcast measures first so per-cell sums cannot overflow
+    values = frame[SUM_MEASURES].astype({'quantity': 'int64'})
+    grouped = values.groupby(keys, observed=True, sort=True, dropna=False)
+    cells = grouped.sum()
+    cells['count'] = grouped.size()
+    return cells.reset_index()
@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+# Lifetime totals kept per customer, in column order
+ROLLUP_COLUMNS = ['sales', 'profit', 'quantity', 'lines', 'orders', 'first_order', 'last_order']
+
+
+class CustomerIndex:
+    """Each customer's rows in date order, plus lifetime totals per customer.
+
+    Row ids are grouped by customer and sorted by order date within a customer, so
+    a drilldown is a slice of one array instead of a scan of the table. ``rollups``
+    holds lifetime sales, profit, quantity, order lines, distinct orders (lines when
+    the data has no ``order_id`` column) and the first and last order dates.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.customers = _categories(frame)
+        codes = frame['customer'].cat.codes.to_numpy()
+        self._order, self._bounds = _group_rows(codes, frame['order_date'].to_numpy(), len(self.customers))
+        self._totals = _totals(frame, codes, len(self.customers))
+        self._rollups = None
+
+    def extended(self, frame, start):
+        """A new index for ``frame``, whose rows from ``start`` on were just appended.
+
+        Appended rows dated no earlier than the history go to the end of their
+        customer's run; otherwise the row order is rebuilt. Lifetime totals are
+        updated from the appended rows alone.
+        """
+        index = CustomerIndex.__new__(CustomerIndex)
+        index.frame = frame
+        index.customers = _categories(frame)
+        index._rollups = None
+        n = len(index.customers)
+        codes = frame['customer'].cat.codes.to_numpy()
+        dates = frame['order_date'].to_numpy()
+        new_codes, new_dates = codes[start:], dates[start:]
+        # Customers only ever grow at the end, so old codes keep their meaning
+        old_bounds = np.concatenate([self._bounds, np.full(n + 1 - len(self._bounds), self._bounds[-1])])
+
+        if not len(new_codes) or (start and new_dates.min() >= dates[:start].max()):
+            new_order, new_bounds = _group_rows(new_codes, new_dates, n)
+            slots = np.repeat(old_bounds, np.diff(np.concatenate([[0], new_bounds])))
+            index._order = np.insert(self._order, slots, new_order + start)
+            index._bounds = old_bounds + new_bounds
+        else:
+            index._order, index._bounds = _group_rows(codes, dates, n)
+
+        delta = _totals(frame.iloc[start:], new_codes, n)
+        old = {column: _padded(values, n, _EMPTY[column]) for column, values in self._totals.items()}
+        totals = {column: old[column] + delta[column] for column in ['sales', 'profit', 'quantity', 'lines', 'orders']}
+        totals['first_order'] = np.minimum(old['first_order'], delta['first_order'])
+        totals['last_order'] = np.maximum(old['last_order'], delta['last_order'])
+        if 'order_id' in frame.columns:
+            # Orders continued from the history were counted twice above
+            totals['orders'] = totals['orders'] - self._repeat_orders(frame, start, new_codes, old_bounds)
+        index._totals = totals
+        return index
+
+    @property
+    def rollups(self):
+        """Lifetime totals per customer, indexed by customer (customers with rows only)."""
+        if self._rollups is None:
+            present = self._totals['lines'] > 0
+            columns = {column: self._totals[column][present] for column in ROLLUP_COLUMNS}
+            for column in ['first_order', 'last_order']:
+                columns[column] = columns[column].view('datetime64[ns]')
+            self._rollups = pd.DataFrame(
+                columns,
+                index=pd.CategoricalIndex(self.customers[present], categories=self.customers, name='customer'),
+            )
+        return self._rollups
+
+    def rows(self, customer, within=None):
+        """Row ids of ``customer`` in date order, limited to the sorted ids ``within``."""
+        code = self.customers.get_indexer([str(customer)])[0]
+        if code < 0:
+            return np.empty(0, dtype=np.int64)
+        rows = self._order[self._bounds[code]:self._bounds[code + 1]]
+        if within is not None and len(rows):
+            if not len(within):
+                return rows[:0]
+            found = np.minimum(np.searchsorted(within, rows), len(within) - 1)
+            rows = rows[within[found] == rows]
+        return rows
+
+    def drilldown(self, customer, within=None):
+        """The rows of ``customer`` (among the row ids ``within``) in date order."""
+        return self.frame.take(self.rows(customer, within))
+
+    def present(self, within=None):
+        """Customers with at least one row, or one among the row ids ``within``."""
+        if within is None:
+            return list(self.rollups.index.astype(str))
+        codes = np.unique(self.frame['customer'].cat.codes.to_numpy()[within])
+        return list(self.customers[codes[codes >= 0]])
+
+    def top(self, metric='profit', n=5):
+        """The ``n`` customers with the highest lifetime ``metric``."""
+        return self.rollups[metric].nlargest(n).reset_index()
+
+    def product_mix(self, customer):
+        """Lifetime sales, quantity and order lines per product for ``customer``."""
+        rows = self.drilldown(customer)
+        return rows.groupby('product_name', observed=True).agg(
+            sales=('sales', 'sum'), quantity=('quantity', 'sum'), lines=('sales', 'size'),
+        ).sort_values('sales', ascending=False).reset_index()
+
+    def _repeat_orders(self, frame, start, new_codes, old_bounds):
+        order_ids = frame['order_id'].to_numpy()
+        repeats = np.zeros(len(old_bounds) - 1, dtype=np.int64)
+        batch = pd.DataFrame({'code': new_codes, 'order_id': order_ids[start:]}).drop_duplicates()
+        for code, ids in batch[batch['code'] >= 0].groupby('code')['order_id']:
+            if code + 1 < len(self._bounds):
+                history = order_ids[self._order[self._bounds[code]:self._bounds[code + 1]]]
+                repeats[code] = len(set(ids) & set(history))
+        return repeats
+
+
+# Neutral values for customers without rows; order dates are kept as int64 nanoseconds
+_EMPTY = {
+    'sales': 0.0, 'profit': 0.0, 'quantity': 0, 'lines': 0, 'orders': 0,
+    'first_order': np.iinfo(np.int64).max, 'last_order': np.iinfo(np.int64).min,
+}
+
+
+def _categories(frame):
+    return pd.Index(frame['customer'].cat.categories.astype(str))
+
+
+def _group_rows(codes, dates, n):
+    # Row ids grouped by customer code and sorted by date within each customer (rows
+    # without a customer first); customer c owns order[bounds[c]:bounds[c + 1]]
+    order = np.lexsort((dates, codes)).astype(np.int64)
+    counts = np.bincount(codes[codes >= 0], minlength=n)
+    missing = int((codes < 0).sum())
+    return order, np.concatenate([[missing], missing + np.cumsum(counts)])
+
+
+def _totals(frame, codes, n):
+    present = codes >= 0
+    codes = codes[present]
+
+    def total(column):
+        return np.bincount(codes, weights=frame[column].to_numpy()[present], minlength=n)
+
+    dates = frame['order_date'].to_numpy()[present].astype('datetime64[ns]').view(np.int64)
+    first = np.full(n, _EMPTY['first_order'])
+    last = np.full(n, _EMPTY['last_order'])
+    np.minimum.at(first, codes, dates)
+    np.maximum.at(last, codes, dates)
+    lines = np.bincount(codes, minlength=n)
+    if 'order_id' in frame.columns:
+        order_codes, _ = pd.factorize(frame['order_id'].to_numpy()[present])
+        pairs = np.unique(codes.astype(np.int64) * (order_codes.max(initial=0) + 1) + order_codes)
+        orders = np.bincount(pairs // (order_codes.max(initial=0) + 1), minlength=n).astype(np.int64)
+    else:
+        orders = lines
+    return {
+        'sales': total('sales'),
+        'profit': total('profit'),
+        'quantity': total('quantity').astype(np.int64),
+        'lines': lines.astype(np.int64),
+        'orders': orders,
+        'first_order': first,
+        'last_order': last,
+    }
+
+
+def _padded(values, n, fill):
+    return np.concatenate([values, np.full(n - len(values), fill, dtype=values.dtype)])
@@ -0,0 +1,251 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import AggregationService
+from .approx import DEFAULT_SAMPLE_SIZE, SAMPLE_STRATA, DistinctSketches, SampleStrata, StratifiedSample
+from .cube import Cube
+from .customers import CustomerIndex
+from .filters import FilterEngine, FilterSpec
+from .ingest import DEFAULT_SHEET, cached_table_path, read_cache
+from .ranking import ProductRanking
+from .schema import REQUIRED_COLUMNS, conform, memory_bytes
+from .search import DEFAULT_MATCHES, HIERARCHY, HierarchyMap, SearchIndex
+from .sql import BACKENDS, DEFAULT_BACKEND, SqlEngine
+from .store import STORE_DIR, AppendStore
+
+
+class Dataset:
+    """A loaded transaction table plus its identity.
+
+    ``key`` is derived from the source content hash, so two handles with the same key
+    hold the same rows. Everything the dashboard derives from a dataset hangs off this
+    object, which lets a single cached handle serve every page and every rerun.
+
+    ``backend`` picks what answers aggregate queries: the in-memory cube
+    (``'pandas'``) or SQL pushed down to the cache file (``'sqlite'``, ``'duckdb'``;
+    see :class:`~pos_analytics.sql.SqlEngine`), which needs a dataset opened with
+    :meth:`from_cache`. Only aggregate queries are routed to it; ``frame`` is
+    loaded whatever the backend.
+    """
+
+    def __init__(self, frame, key, name, backend=None):
+        backend = backend or DEFAULT_BACKEND
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; choose from {', '.join(BACKENDS)}")
+        missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Dataset is missing required columns: {', '.join(missing)}")
+        self.frame = frame
+        self.key = key
+        self.name = name
+        self.backend = backend
+        self.cache_path = None
+        # Bumped by every append; ``store_seq`` is the last store batch applied
+        self.version = 0
+        self.store_seq = 0
+        self._options = {}
+        self._derived = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_cache(cls, cache_path, name=None, backend=None):
+        """Open a columnar cache file produced by :mod:`pos_analytics.ingest`."""
+        key = os.path.splitext(os.path.basename(cache_path))[0]
+        dataset = cls(read_cache(cache_path), key=key, name=name or key, backend=backend)
+        dataset.cache_path = cache_path
+        return dataset
+
+    @classmethod
+    def from_source(cls, source_path, sheet_name=DEFAULT_SHEET, store_dir=STORE_DIR, backend=None):
+        """Open a source through the columnar cache with its appended batches applied."""
+        dataset = cls.from_cache(cached_table_path(source_path, sheet_name), name=source_path, backend=backend)
+        dataset.sync(AppendStore.for_source(source_path, store_dir))
+        return dataset
+
+    def options(self, column):
+        """Sorted distinct values of a column, computed once per dataset version."""
+        if column not in self._options:
+            series = self.frame[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Categories are sorted by the schema step, but appends add new ones at the end
+                values = series.cat.categories
+                if not values.is_monotonic_increasing:
+                    values = values.sort_values()
+            else:
+                values = sorted(series.dropna().unique())
+            self._options[column] = list(values)
+        return self._options[column]
+
+    def options_under(self, column, **selected):
+        """Options of ``column`` found under the nearest parent with a selection.
+
+        ``selected`` maps parent dimensions (see ``HIERARCHY``) to their selected
+        values, e.g. ``options_under('city', state=['Texas'])``. With no parent
+        selected every option is returned.
+        """
+        for parent in HIERARCHY.get(column, []):
+            if selected.get(parent):
+                hierarchy = self.derived(
+                    f'hierarchy:{parent}:{column}',
+                    lambda: HierarchyMap(self.frame[parent], self.frame[column]),
+                )
+                return hierarchy.children_of(selected[parent])
+        return self.options(column)
+
+    def search(self, column, query, k=DEFAULT_MATCHES, spec=None, **selected):
+        """Up to ``k`` options of ``column`` matching ``query``; see :class:`SearchIndex`.
+
+        Options can be narrowed to those found in the rows matching ``spec`` and to
+        those under the parent ``selected`` values (as for :meth:`options_under`).
+        Results are memoized per spec and selection, so the narrowed options are
+        only worked out when the search is not a repeat.
+        """
+        index = self.derived(f'search:{column}', lambda: SearchIndex(self.options(column)))
+        selected = {parent: tuple(values) for parent, values in selected.items() if values}
+        spec = None if spec == FilterSpec() else spec
+        if spec is None and not selected:
+            return index.search(query, k)
+
+        def within():
+            values = self.options_under(column, **selected)
+            rows = None if spec is None else self.filters.positions(spec)
+            if rows is not None:
+                codes = self.frame[column].cat.codes.to_numpy()[rows]
+                present = set(self.frame[column].cat.categories[np.unique(codes[codes >= 0])])
+                values = [value for value in values if value in present]
+            return values
+
+        return index.search(query, k, within, scope=(spec, tuple(sorted(selected.items()))))
+
+    def sample(self, spec=None, size=DEFAULT_SAMPLE_SIZE, strata=SAMPLE_STRATA, seed=0):
+        """A :class:`~pos_analytics.approx.StratifiedSample` of the rows matching ``spec``."""
+        rows = self.filters.positions(spec or FilterSpec())
+        return StratifiedSample(self.strata(strata, seed), rows, size)
+
+    def strata(self, columns=SAMPLE_STRATA, seed=0):
+        """:class:`~pos_analytics.approx.SampleStrata` over ``columns`` that samples are drawn from."""
+        columns = list(columns)
+        return self.derived(
+            f"strata:{','.join(columns)}:{seed}", lambda: SampleStrata(self.frame, columns, seed)
+        )
+
+    def prepare_estimates(self, strata=(SAMPLE_STRATA, ['discount'])):
+        """Build the sketches and sample strata approximate mode reads, ahead of use."""
+        self.sketches
+        for columns in strata:
+            self.strata(columns)
+
+    def append(self, batch):
+        """Append new transaction rows, updating derived structures by delta.
+
+        The batch is checked and cast with :func:`~pos_analytics.schema.conform`.
+        Filter indexes and the cube absorb just the new rows; other derived
+        structures are dropped and rebuilt on next use. Everything is swapped in at
+        once, so readers holding the previous frame keep a consistent view.
+        """
+        batch = conform(batch, self.frame)
+        # Keep date order when the batch follows the history, as daily closes do
+        batch = batch.sort_values('order_date', kind='stable')
+        with self._lock:
+            start = len(self.frame)
+            base = self.frame.astype({
+                column: dtype
+                for column, dtype in batch.dtypes.items()
+                if dtype != self.frame[column].dtype
+            })
+            frame = pd.concat([base, batch], ignore_index=True)
+            frame.attrs = dict(self.frame.attrs)
+
+            previous, self._derived = self._derived, {}
+            self.frame = frame
+            self._options = {}
+            updates = {
+                'filters': lambda engine: engine.extended(frame, start),
+                'cube': lambda cube: cube.extended(frame, start),
+                'sql': lambda engine: engine.extended(frame, start),
+                'customers': lambda index: index.extended(frame, start),
+                'sketches': lambda sketches: sketches.extended(frame, start),
+                'strata': lambda strata: strata.extended(frame, start),
+                'rankings': lambda ranking: ranking.extended(frame, start),
+                'aggregates': lambda service: service.extended(self.engine),
+            }
+            for name, structure in previous.items():
+                kind = name.split(':')[0]
+                if kind in updates:
+                    self._derived[name] = updates[kind](structure)
+            self.version += 1
+
+    def sync(self, store):
+        """Apply any batches committed to an :class:`~pos_analytics.store.AppendStore`."""
+        with self._lock:
+            batch, seq = store.read_after(self.store_seq)
+            if batch is not None:
+                self.append(batch)
+                self.store_seq = seq
+        return self.store_seq
+
+    def derived(self, name, factory):
+        """Build a per-dataset structure once and share it across sessions and reruns."""
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = factory()
+            return self._derived[name]
+
+    @property
+    def filters(self):
+        """Index-backed :class:`~pos_analytics.filters.FilterEngine` over this dataset."""
+        return self.derived('filters', lambda: FilterEngine(self.frame))
+
+    @property
+    def cube(self):
+        """Pre-aggregated :class:`~pos_analytics.cube.Cube` the pages roll up from."""
+        return self.derived('cube', lambda: Cube(self.frame))
+
+    @property
+    def customers(self):
+        """:class:`~pos_analytics.customers.CustomerIndex` for drilldowns and lifetime totals."""
+        return self.derived('customers', lambda: CustomerIndex(self.frame))
+
+    @property
+    def sketches(self):
+        """:class:`~pos_analytics.approx.DistinctSketches` for approximate distinct counts."""
+        return self.derived('sketches', lambda: DistinctSketches(self.frame))
+
+    @property
+    def rankings(self):
+        """:class:`~pos_analytics.ranking.ProductRanking` for top and bottom products."""
+        return self.derived('rankings', lambda: ProductRanking(self.frame))
+
+    @property
+    def engine(self):
+        """What aggregates roll up from: the cube, or a :class:`~pos_analytics.sql.SqlEngine`."""
+        if self.backend == 'pandas':
+            return self.cube
+        if self.cache_path is None:
+            raise ValueError(f'The {self.backend} backend needs a dataset opened from its cache file')
+        return self.derived('sql', lambda: SqlEngine.open(self.backend, self.cache_path, self.frame))
+
+    @property
+    def aggregates(self):
+        """Memoizing :class:`~pos_analytics.aggregate.AggregationService` over the engine."""
+        return self.derived('aggregates', lambda: AggregationService(self.engine))
+
+    @property
+    def memory_report(self):
+        """Bytes used by the frame as parsed and after the schema step."""
+        report = dict(self.frame.attrs.get('memory', {}))
+        report.setdefault('bytes_after', memory_bytes(self.frame))
+        report.setdefault('bytes_before', report['bytes_after'])
+        return report
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __repr__(self):
+        return (
+            f'Dataset(name={self.name!r}, key={self.key!r}, version={self.version}, '
+            f'rows={len(self)}, backend={self.backend!r})'
+        )
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# Discounts are coded as whole percents (0.15 -> 15); -1 marks a missing discount or
+# one outside 0-100%
+DISCOUNT_CODES = 101
+
+# Discount ranges charted on the Discount page, as edges in percent. Ranges are
+# closed on the right, except the first, which also holds its lower edge: rows
+# without a discount fall in 0-10%.
+DISCOUNT_EDGES = [0, 10, 20, 30, 50, 100]
+
+# Totals a histogram keeps per discount code; profit_margin is kept as a sum and
+# returned as the mean over rows
+HISTOGRAM_MEASURES = ['sales', 'profit', 'profit_margin', 'count']
+
+
+class DiscountHistogram:
+    """Sales, profit, margin and row totals per whole-percent discount, per group.
+
+    Built from a roll-up by the ``by`` columns and ``discount_pct``. Totals are kept
+    as prefix sums over the 101 discount codes, so any discount range is the
+    difference of two entries: rebinning into new edges merges adjacent buckets
+    without going back to the rows or the cube.
+    """
+
+    def __init__(self, rollup, by=()):
+        self.by = list(by)
+        rollup = rollup[rollup['discount_pct'] >= 0]
+        if self.by:
+            keys = rollup.groupby(self.by, observed=True, sort=True).ngroup().to_numpy()
+            self.groups = rollup[self.by].drop_duplicates().sort_values(self.by).reset_index(drop=True)
+        else:
+            keys = np.zeros(len(rollup), dtype=np.int64)
+            self.groups = pd.DataFrame(index=range(1))
+        values = rollup[HISTOGRAM_MEASURES].to_numpy(dtype=np.float64)
+        # Roll-ups return the margin as a mean; weight it back into a sum
+        values[:, 2] *= values[:, 3]
+        totals = np.zeros((len(self.groups), DISCOUNT_CODES, len(HISTOGRAM_MEASURES)))
+        np.add.at(totals, (keys, rollup['discount_pct'].to_numpy().astype(np.int64)), values)
+        # prefix[g, c] holds the group's totals over codes below c
+        self._prefix = np.zeros((len(self.groups), DISCOUNT_CODES + 1, len(HISTOGRAM_MEASURES)))
+        np.cumsum(totals, axis=1, out=self._prefix[:, 1:])
+
+    def rebin(self, edges=DISCOUNT_EDGES, labels=None):
+        """Totals per discount range between ``edges`` (percent), one row per
+        (group, range), with ``profit_margin`` as the mean over rows.
+
+        Every range is kept, so charts keep the same categories whatever the
+        filter; empty ranges have zero totals and a NaN margin.
+        """
+        edges = check_edges(edges)
+        labels = list(labels) if labels is not None else range_labels(edges)
+        if len(labels) != len(edges) - 1:
+            raise ValueError(f'{len(edges) - 1} ranges need as many labels, got {len(labels)}')
+        lows = np.array(edges[:-1]) + 1
+        lows[0] = edges[0]
+        sums = self._prefix[:, np.array(edges[1:]) + 1] - self._prefix[:, lows]
+        ranges = pd.Categorical(np.tile(labels, len(self.groups)), categories=labels, ordered=True)
+        return self._frame(sums, len(labels), 'discount_range', ranges, keep_empty=True)
+
+    def levels(self):
+        """Totals per distinct discount (as a fraction), one row per non-empty
+        (group, discount)."""
+        sums = np.diff(self._prefix, axis=1)
+        discounts = np.tile(np.arange(DISCOUNT_CODES) / 100, len(self.groups))
+        return self._frame(sums, DISCOUNT_CODES, 'discount', discounts)
+
+    def _frame(self, sums, width, column, keys, keep_empty=False):
+        groups = self.groups.loc[self.groups.index.repeat(width)].reset_index(drop=True)
+        sums = sums.reshape(-1, len(HISTOGRAM_MEASURES))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frame = pd.concat([groups, pd.DataFrame({
+                column: keys,
+                'sales': sums[:, 0],
+                'profit': sums[:, 1],
+                'profit_margin': sums[:, 2] / sums[:, 3],
+                'count': sums[:, 3].astype(np.int64),
+            })], axis=1)
+        if keep_empty:
+            return frame
+        return frame[frame['count'] > 0].reset_index(drop=True)
+
+
+def discount_codes(discounts):
+    """Whole-percent codes of discount fractions, -1 for missing or out-of-range ones."""
+    percent = np.floor(discounts.to_numpy(dtype=np.float64) * 100 + 0.5)
+    valid = (percent >= 0) & (percent < DISCOUNT_CODES)
+    return pd.Series(np.where(valid, percent, -1).astype(np.int8), index=discounts.index)
+
+
+def check_edges(edges):
+    """``edges`` as a list of whole percents, which must increase within 0-100.
+
+    Accepts a comma-separated string, as given on the command line.
+    """
+    if isinstance(edges, str):
+        edges = [edge for edge in edges.split(',') if edge.strip()]
+    try:
+        edges = [int(edge) for edge in edges]
+    except (TypeError, ValueError):
+        raise ValueError(f'Discount edges must be whole percents, got {edges!r}') from None
+    if len(edges) < 2 or edges[0] < 0 or edges[-1] >= DISCOUNT_CODES or any(
+        low >= high for low, high in zip(edges, edges[1:])
+    ):
+        raise ValueError(f'Discount edges must increase within 0-100, got {edges}')
+    return edges
+
+
+def range_labels(edges):
+    """Labels of the ranges between ``edges``, e.g. ``'0-10%'``."""
+    return [f'{low}-{high}%' for low, high in zip(edges, edges[1:])]
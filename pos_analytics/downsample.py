@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+# Default cap on points sent to the browser for one time-series chart
+DEFAULT_POINT_BUDGET = 2000
+
+# Default row count above which scatter plots switch to binned rendering
+DEFAULT_SCATTER_ROW_LIMIT = 20_000
+
+# Bucket sizes tried in order, finest first: (period alias, label, approximate days)
+RESOLUTIONS = [
+    ('D', 'Daily', 1),
+    ('W', 'Weekly', 7),
+    ('M', 'Monthly', 30.44),
+    ('Q', 'Quarterly', 91.31),
+    ('Y', 'Yearly', 365.25),
+]
+
+
+def pick_resolution(dates, max_points=DEFAULT_POINT_BUDGET):
+    """The finest resolution whose bucket count over ``dates`` fits ``max_points``."""
+    dates = pd.Series(dates).dropna()
+    if dates.empty:
+        return RESOLUTIONS[0]
+    span_days = (dates.max() - dates.min()).days + 1
+    for resolution in RESOLUTIONS:
+        if span_days / resolution[2] <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def bucket_time_series(frame, x, y, max_points=DEFAULT_POINT_BUDGET):
+    """Sum ``y`` into day, week, month, quarter or year buckets of ``x``.
+
+    The finest resolution that keeps the series within ``max_points`` is used, so
+    short ranges stay daily. Buckets are sums, so totals are exactly preserved.
+    Each bucket is labelled with its start date. Returns the bucketed frame and
+    the resolution label.
+    """
+    alias, label, _ = pick_resolution(frame[x], max_points)
+    if alias == 'D' and frame[x].dt.normalize().is_unique:
+        return frame, label
+    starts = frame[x].dt.to_period(alias).dt.start_time.rename(x)
+    bucketed = frame.groupby(starts, sort=True)[y].sum().reset_index()
+    return bucketed, label
+
+
+def lttb_indices(x, y, n_out):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of ``n_out - 2`` equal buckets in
+    between, the point forming the largest triangle with the previously kept point
+    and the next bucket's mean. The line keeps its visual shape (peaks included), but
+    the kept points are samples, not totals.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        next_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def lttb_time_series(frame, x, y, max_points=DEFAULT_POINT_BUDGET):
+    """Rows of ``frame`` (sorted by ``x``) kept by LTTB on column ``y``."""
+    frame = frame.sort_values(x)
+    positions = frame[x].astype('int64') if pd.api.types.is_datetime64_any_dtype(frame[x]) else frame[x]
+    return frame.iloc[lttb_indices(positions, frame[y], max_points)]
+
+
+def bin_2d(frame, x, y, weight, bins=50):
+    """Bin ``frame`` on an ``x`` by ``y`` grid, summing ``weight`` per cell.
+
+    Returns one row per non-empty cell with the cell centres in ``x`` and ``y``,
+    the row count in ``rows`` and the summed ``weight``, so a density chart built
+    from it has at most ``bins * bins`` points however many rows went in.
+    """
+    xs = frame[x].to_numpy(dtype='float64')
+    ys = frame[y].to_numpy(dtype='float64')
+    weights = frame[weight].to_numpy(dtype='float64')
+    finite = np.isfinite(xs) & np.isfinite(ys) & np.isfinite(weights)
+    xs, ys, weights = xs[finite], ys[finite], weights[finite]
+    if not len(xs):
+        return pd.DataFrame({x: [], y: [], 'rows': [], weight: []})
+
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=bins)
+    sums, _, _ = np.histogram2d(xs, ys, bins=[x_edges, y_edges], weights=weights)
+    x_index, y_index = np.nonzero(counts)
+    return pd.DataFrame({
+        x: (x_edges[x_index] + x_edges[x_index + 1]) / 2,
+        y: (y_edges[y_index] + y_edges[y_index + 1]) / 2,
+        'rows': counts[x_index, y_index].astype('int64'),
+        weight: sums[x_index, y_index],
+    })
@@ -0,0 +1,139 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from .instrument import stage
+
+# Figures kept per process; they are small because they are built from aggregates
+DEFAULT_MAX_FIGURES = 256
+
+
+class FigureCache:
+    """A process-wide LRU of built Plotly figures, keyed by a content hash.
+
+    Cached figures are shared by every session and must not be modified after
+    they are returned; describe every change through the factory functions instead.
+
+    Plotly figure objects are cached rather than their JSON: Streamlit serializes a
+    figure object directly, but re-validates a plain dict, which costs more than it
+    saves.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_FIGURES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build, name='figure'):
+        with stage(name) as info:
+            with self._lock:
+                figure = self._figures.get(key)
+                if figure is not None:
+                    self._figures.move_to_end(key)
+                    self.hits += 1
+                    info['cached'] = True
+                    return figure
+                self.misses += 1
+            figure = build()
+            info['cached'] = False
+            with self._lock:
+                self._figures[key] = figure
+                while len(self._figures) > self.max_entries:
+                    self._figures.popitem(last=False)
+            return figure
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._figures)}
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+
+figure_cache = FigureCache()
+
+
+def fingerprint(*parts):
+    """A stable hex digest of chart inputs: frames, arrays, dicts, lists and scalars."""
+    digest = hashlib.sha1()
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+
+def _feed(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr([(str(name), str(dtype)) for name, dtype in value.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, (pd.Series, pd.Index)):
+        digest.update(f'{type(value).__name__}:{value.name}:{value.dtype}'.encode())
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f'ndarray:{value.dtype}:{value.shape}'.encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b'{')
+        for name in sorted(value, key=str):
+            digest.update(repr(name).encode())
+            _feed(digest, value[name])
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            _feed(digest, item)
+        digest.update(b']')
+    else:
+        digest.update(f'{type(value).__name__}:{value!r};'.encode())
+
+
+def cached_figure(spec, build, name='figure'):
+    """Return the figure built by ``build()`` for ``spec``, reusing an earlier build.
+
+    ``spec`` must describe everything the figure depends on (data included); it is
+    reduced to a digest with :func:`fingerprint` together with the default theme.
+    ``name`` labels the stage in an active :mod:`~pos_analytics.instrument` recorder.
+    """
+    return figure_cache.get_or_build(fingerprint(pio.templates.default, spec), build, name)
+
+
+def px_figure(kind, data, traces=(), layout=None, **kwargs):
+    """A cached Plotly Express figure: ``px.<kind>(data, **kwargs)``, then restyled.
+
+    Each dict in ``traces`` is passed to ``update_traces`` in order, then ``layout``
+    to ``update_layout``, so the whole chart is described by the cache key.
+    """
+    def build():
+        figure = getattr(px, kind)(data, **kwargs)
+        for arguments in traces:
+            figure.update_traces(**arguments)
+        if layout:
+            figure.update_layout(**layout)
+        return figure
+
+    name = f"figure {kind}: {kwargs.get('title', '')}".rstrip(': ')
+    return cached_figure(('px', kind, data, kwargs, list(traces), layout), build, name)
+
+
+def gauge_figure(value, title, color):
+    """A cached gauge indicator whose axis runs to 120% of ``value``."""
+    def build():
+        figure = go.Figure(go.Indicator(
+            mode="gauge+number",
+            value=value,
+            title={'text': title},
+            gauge={'axis': {'range': [0, value * 1.2]},
+                   'bar': {'color': color}}
+        ))
+        figure.update_layout(margin=dict(t=10, b=10, l=10, r=10))
+        return figure
+
+    return cached_figure(('gauge', value, title, color), build, f'figure gauge: {title}')
@@ -0,0 +1,234 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .instrument import stage
+
+# Dimensions offered as sidebar filters, in sidebar order
+FILTER_DIMENSIONS = ['category', 'subcategory', 'product_name', 'region', 'state', 'city', 'segment']
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """A hashable description of the sidebar filter state.
+
+    ``selections`` holds ``(dimension, values)`` pairs with the values deduplicated
+    and sorted and empty selections dropped, so equal filter states always produce
+    equal specs.
+    Both date bounds are inclusive, matching the sidebar date inputs.
+    """
+
+    start: pd.Timestamp = None
+    end: pd.Timestamp = None
+    selections: tuple = ()
+
+    @classmethod
+    def build(cls, start=None, end=None, **selected):
+        selections = tuple(
+            (dimension, tuple(sorted({str(value) for value in values})))
+            for dimension, values in sorted(selected.items())
+            if values
+        )
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        return cls(start=start, end=end, selections=selections)
+
+    def selected(self, dimension):
+        """Values selected for a dimension, or an empty tuple when it is unfiltered."""
+        return dict(self.selections).get(dimension, ())
+
+
+class FilterEngine:
+    """Answers filter specs by intersecting precomputed row indexes.
+
+    Every dimension gets one sorted row-id array per value (built lazily, the first
+    time the dimension is filtered), and ``order_date`` gets a sort order so a date
+    range becomes two binary searches. The last ``memo_size`` results are kept, so
+    a rerun with unchanged filters does no work at all.
+    """
+
+    def __init__(self, frame, memo_size=32):
+        self.frame = frame
+        self.memo_size = memo_size
+        self.hits = 0
+        self.misses = 0
+        self._indexes = {}
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+        dates = frame['order_date'].to_numpy()
+        if frame['order_date'].is_monotonic_increasing:
+            # Rows already in date order: a date range is a contiguous slice
+            self._date_order = None
+            self._sorted_dates = dates
+        else:
+            self._date_order = np.argsort(dates, kind='stable')
+            self._sorted_dates = dates[self._date_order]
+
+    def positions(self, spec):
+        """Sorted row positions matching ``spec``, or ``None`` when every row matches.
+
+        The returned array is read-only because it is shared with later callers.
+        """
+        with self._lock:
+            if spec in self._memo:
+                self._memo.move_to_end(spec)
+                self.hits += 1
+                return self._memo[spec]
+        self.misses += 1
+        result = self._compute(spec)
+        if result is not None:
+            result.setflags(write=False)
+        with self._lock:
+            self._memo[spec] = result
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return result
+
+    def date_range(self):
+        """First and last order date, read off the sorted date index (``NaT`` if no rows).
+
+        Missing dates sort last, so they are skipped with one binary search.
+        """
+        n_dates = np.searchsorted(self._sorted_dates, np.datetime64('NaT'), 'left')
+        if not n_dates:
+            return pd.NaT, pd.NaT
+        return pd.Timestamp(self._sorted_dates[0]), pd.Timestamp(self._sorted_dates[n_dates - 1])
+
+    def select(self, spec):
+        """Rows matching ``spec``.
+
+        Returns the frame itself when nothing is filtered and a slice when the match
+        is one contiguous block (a date range over date-ordered rows); only scattered
+        matches are gathered into a new frame.
+        """
+        with stage('filter', rows=len(self.frame)) as entry:
+            rows = self.positions(spec)
+            entry['rows_out'] = len(self.frame) if rows is None else len(rows)
+            if rows is None:
+                return self.frame
+            if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+                return self.frame.iloc[rows[0]:rows[-1] + 1]
+            return self.frame.take(rows)
+
+    def extended(self, frame, start):
+        """A new engine for ``frame``, whose rows from ``start`` on were just appended.
+
+        Indexes already built are merged with the appended rows' ids instead of being
+        re-sorted from scratch; memoized results are dropped.
+        """
+        engine = FilterEngine.__new__(FilterEngine)
+        engine.frame = frame
+        engine.memo_size = self.memo_size
+        engine.hits = self.hits
+        engine.misses = self.misses
+        engine._memo = OrderedDict()
+        engine._lock = threading.Lock()
+
+        new_dates = frame['order_date'].to_numpy()[start:]
+        if self._date_order is None and (
+            not len(new_dates)
+            or (frame['order_date'].iloc[start:].is_monotonic_increasing
+                and (start == 0 or new_dates[0] >= self._sorted_dates[-1]))
+        ):
+            engine._date_order = None
+            engine._sorted_dates = frame['order_date'].to_numpy()
+        else:
+            old_order = np.arange(start) if self._date_order is None else self._date_order
+            new_order = np.argsort(new_dates, kind='stable')
+            # Appended rows go after existing rows with the same date, like a stable sort
+            slots = np.searchsorted(self._sorted_dates, new_dates[new_order], 'right')
+            engine._date_order = np.insert(old_order, slots, new_order + start)
+            engine._sorted_dates = np.insert(self._sorted_dates, slots, new_dates[new_order])
+
+        engine._indexes = {
+            dimension: engine._extend_index(index, dimension, start)
+            for dimension, index in self._indexes.items()
+        }
+        return engine
+
+    def _extend_index(self, index, dimension, start):
+        _, old_order, old_bounds = index
+        categories, new_order, new_bounds = _value_index(self.frame[dimension].iloc[start:])
+        # Categories only ever grow at the end, so old codes keep their meaning
+        old_bounds = np.concatenate([
+            old_bounds, np.full(len(categories) + 1 - len(old_bounds), old_bounds[-1]),
+        ])
+        # Each appended row is inserted at the end of its value's run of row ids
+        slots = np.repeat(old_bounds, np.diff(np.concatenate([[0], new_bounds])))
+        order = np.insert(old_order, slots, new_order + start)
+        return categories, order, old_bounds + new_bounds
+
+    def _compute(self, spec):
+        candidates = []
+        date_rows = self._date_rows(spec.start, spec.end)
+        if date_rows is not None:
+            candidates.append(date_rows)
+        for dimension, values in spec.selections:
+            candidates.append(self._value_rows(dimension, values))
+
+        if not candidates:
+            return None
+        # Intersect smallest first so every step works on the fewest ids
+        candidates.sort(key=len)
+        rows = candidates[0]
+        for other in candidates[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def _date_rows(self, start, end):
+        n_rows = len(self._sorted_dates)
+        lo = 0 if start is None else np.searchsorted(self._sorted_dates, start.to_datetime64(), 'left')
+        hi = n_rows if end is None else np.searchsorted(self._sorted_dates, end.to_datetime64(), 'right')
+        if lo == 0 and hi == n_rows:
+            return None
+        if hi <= lo:
+            return np.empty(0, dtype=np.int64)
+        if self._date_order is None:
+            return np.arange(lo, hi, dtype=np.int64)
+        return np.sort(self._date_order[lo:hi])
+
+    def _value_rows(self, dimension, values):
+        categories, order, bounds = self._index(dimension)
+        codes = categories.get_indexer(list(values))
+        parts = [order[bounds[code]:bounds[code + 1]] for code in codes if code >= 0]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        # Row sets of distinct values are disjoint, so a sort is enough for the union
+        return np.sort(np.concatenate(parts))
+
+    def _index(self, dimension):
+        index = self._indexes.get(dimension)
+        if index is None:
+            index = self._build_index(dimension)
+            with self._lock:
+                self._indexes[dimension] = index
+        return index
+
+    def _build_index(self, dimension):
+        return _value_index(self.frame[dimension])
+
+
+def _value_index(series):
+    """Categories, row ids grouped by value, and each value's bounds in that order.
+
+    Rows with a missing value come first; the rows of category ``c`` are
+    ``order[bounds[c]:bounds[c + 1]]``.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object).where(series.isna(), series.astype(str)).astype('category')
+    categories = pd.Index(series.cat.categories.astype(str))
+    codes = series.cat.codes.to_numpy()
+    # A stable sort keeps each value's row ids ascending
+    order = np.argsort(codes, kind='stable').astype(np.int64)
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    missing = int((codes < 0).sum())
+    bounds = np.concatenate([[missing], missing + np.cumsum(counts)])
+    return categories, order, bounds
@@ -0,0 +1,393 @@
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import os
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .schema import CATEGORICAL_MAX_RATIO, DIMENSIONS, REQUIRED_COLUMNS
+
+# Where converted datasets live; one Arrow/Feather file per source content hash
+CACHE_DIR = os.environ.get('POS_CACHE_DIR', '.pos_cache')
+DEFAULT_SHEET = 'superstore_dataset'
+DATE_COLUMNS = ['order_date', 'ship_date']
+
+# Bump whenever the on-disk layout of cached tables changes so stale files are rebuilt
+CACHE_VERSION = 3
+
+# Rows per chunk when streaming a source into the cache
+STREAM_CHUNK_ROWS = 100_000
+
+# Schema metadata key holding the JSON stored alongside a cached table
+METADATA_KEY = b'pos_analytics'
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the sha1 hex digest of a file, read in fixed-size chunks."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_source(source, sheet_name=DEFAULT_SHEET, file_name=None):
+    """Parse a raw Excel, CSV or JSON-lines source (path or file object) into a DataFrame."""
+    file_name = str(file_name or source)
+    if file_name.endswith('.xlsx'):
+        return pd.read_excel(source, sheet_name=sheet_name, engine='openpyxl')
+    if file_name.endswith('.csv'):
+        frame = pd.read_csv(source)
+    elif file_name.endswith(('.jsonl', '.json')):
+        frame = pd.read_json(source, lines=True, convert_dates=False)
+    else:
+        raise ValueError("Unsupported file type! Please upload an Excel or CSV file.")
+    # Text formats have no date type; parse the date columns here so every source agrees
+    for column in DATE_COLUMNS:
+        if column in frame.columns:
+            frame[column] = pd.to_datetime(frame[column], errors='coerce')
+    return frame
+
+
+def write_cache(frame, cache_path, metadata=None):
+    """Write a frame as an uncompressed Feather file so it can be memory-mapped.
+
+    ``metadata`` is stored as JSON in the file schema and comes back as
+    ``frame.attrs`` from :func:`read_cache`.
+    """
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    table = pa.Table.from_pandas(frame.reset_index(drop=True), preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        METADATA_KEY: json.dumps(metadata or {}).encode(),
+    })
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    # Atomic swap so concurrent sessions never see a half-written file
+    os.replace(tmp_path, cache_path)
+
+
+def read_cache(cache_path):
+    """Load a cached table memory-mapped; numeric columns stay backed by the file."""
+    table = feather.read_table(cache_path, memory_map=True)
+    frame = table.to_pandas(split_blocks=True)
+    frame.attrs.update(json.loads((table.schema.metadata or {}).get(METADATA_KEY, b'{}')))
+    return frame
+
+
+def iter_source_chunks(source, sheet_name=DEFAULT_SHEET, file_name=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield ``(chunk, fraction_done)`` pairs from an Excel, CSV or JSON-lines source.
+
+    CSV and JSON lines are read with pandas' chunked readers. Excel goes through
+    openpyxl's read-only mode, which walks the sheet row by row instead of loading
+    it whole. ``fraction_done`` is an estimate in ``[0, 1]``, or ``None`` when the
+    size of the source is unknown.
+    """
+    file_name = str(file_name or source)
+    with contextlib.ExitStack() as stack:
+        handle = source
+        if isinstance(source, (str, os.PathLike)):
+            handle = stack.enter_context(open(source, 'rb'))
+
+        if file_name.endswith('.xlsx'):
+            yield from _iter_excel_chunks(handle, sheet_name, chunk_rows)
+            return
+        if file_name.endswith('.csv'):
+            reader = pd.read_csv(handle, chunksize=chunk_rows)
+        elif file_name.endswith(('.jsonl', '.json')):
+            reader = pd.read_json(handle, lines=True, chunksize=chunk_rows, convert_dates=False)
+        else:
+            raise ValueError("Unsupported file type! Please upload an Excel or CSV file.")
+
+        size = _stream_size(handle)
+        with reader:
+            for chunk in reader:
+                yield chunk, (handle.tell() / size if size else None)
+
+
+def _stream_size(handle):
+    try:
+        position = handle.tell()
+        size = handle.seek(0, io.SEEK_END)
+        handle.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
+
+
+def _iter_excel_chunks(handle, sheet_name, chunk_rows):
+    workbook = openpyxl.load_workbook(handle, read_only=True, data_only=True)
+    try:
+        if isinstance(sheet_name, str):
+            sheet = workbook[sheet_name]
+        else:
+            sheet = workbook.worksheets[sheet_name or 0]
+        total_rows = sheet.max_row
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(name) for name in next(rows, ())]
+        done = 0
+        while True:
+            block = list(itertools.islice(rows, chunk_rows))
+            if not block:
+                break
+            done += len(block)
+            fraction = done / (total_rows - 1) if total_rows and total_rows > 1 else None
+            yield pd.DataFrame.from_records(block, columns=header), fraction
+    finally:
+        workbook.close()
+
+
+def stream_convert(source, cache_path, sheet_name=DEFAULT_SHEET, file_name=None,
+                   chunk_rows=STREAM_CHUNK_ROWS, progress=None):
+    """Convert a source into a columnar cache file without loading it whole.
+
+    The source is read in chunks of ``chunk_rows``. Each chunk is checked and
+    type-cast, then written to an intermediate Arrow file with its text columns
+    coded against dictionaries that grow as new values appear. A second pass
+    streams those record batches into the final Feather file, swapping in sorted
+    dictionaries (so text columns load as sorted Categoricals, as with
+    :func:`~pos_analytics.schema.apply_schema`) and downcasting whole-number
+    columns. Peak memory is one chunk plus the distinct values of each text column.
+
+    ``progress(rows, fraction_done)`` is called after every chunk.
+    """
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    raw_path = f'{cache_path}.{os.getpid()}.raw'
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    encoder = None
+    try:
+        with contextlib.ExitStack() as stack:
+            writer = None
+            for chunk, fraction in iter_source_chunks(source, sheet_name, file_name, chunk_rows):
+                if encoder is None:
+                    encoder = _ChunkEncoder(chunk)
+                batch = encoder.encode(chunk)
+                if writer is None:
+                    writer = stack.enter_context(pa.ipc.new_file(raw_path, batch.schema))
+                writer.write_batch(batch)
+                if progress is not None:
+                    progress(encoder.rows, fraction)
+        if encoder is None:
+            raise ValueError('The file contains no rows.')
+
+        schema = encoder.final_schema({
+            METADATA_KEY: json.dumps({'memory': {'bytes_before': encoder.parsed_bytes}}).encode(),
+        })
+        with pa.memory_map(raw_path) as raw_file:
+            reader = pa.ipc.open_file(raw_file)
+            with pa.ipc.new_file(tmp_path, schema) as writer:
+                for index in range(reader.num_record_batches):
+                    writer.write_batch(encoder.finalize(reader.get_batch(index), schema))
+        os.replace(tmp_path, cache_path)
+    finally:
+        for path in (raw_path, tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return cache_path
+
+
+class _ChunkEncoder:
+    """Casts source chunks to a fixed Arrow layout and tracks what the final pass needs."""
+
+    def __init__(self, first_chunk):
+        missing = [column for column in REQUIRED_COLUMNS if column not in first_chunk.columns]
+        if missing:
+            raise ValueError(f"Dataset is missing required columns: {', '.join(missing)}")
+        self.columns = [str(column) for column in first_chunk.columns]
+        self.kinds = {}
+        for column in self.columns:
+            if column in DATE_COLUMNS:
+                self.kinds[column] = 'date'
+            elif column not in DIMENSIONS and pd.api.types.is_numeric_dtype(first_chunk[column]):
+                self.kinds[column] = 'number'
+            else:
+                self.kinds[column] = 'text'
+        self.dictionaries = {column: {} for column in self.columns if self.kinds[column] == 'text'}
+        # Numbers are carried as float64 until every chunk has been seen
+        self.whole = {column: True for column in self.columns if self.kinds[column] == 'number'}
+        self.lows = {}
+        self.highs = {}
+        self.rows = 0
+        self.parsed_bytes = 0
+
+    def encode(self, chunk):
+        if [str(column) for column in chunk.columns] != self.columns:
+            raise ValueError('Column names changed part-way through the file.')
+        self.parsed_bytes += int(chunk.memory_usage(deep=True).sum())
+        arrays = []
+        for column in self.columns:
+            values = chunk[column]
+            present = values.notna().to_numpy()
+            kind = self.kinds[column]
+            if kind == 'date':
+                parsed = pd.to_datetime(values, errors='coerce')
+                self._check(column, parsed.notna().to_numpy(), present, 'dates')
+                arrays.append(pa.array(parsed.to_numpy(dtype='datetime64[ns]'), pa.timestamp('ns')))
+            elif kind == 'number':
+                parsed = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64')
+                known = ~np.isnan(parsed)
+                self._check(column, known, present, 'numbers')
+                self._track_numbers(column, parsed, known)
+                arrays.append(pa.array(parsed, pa.float64(), mask=~known))
+            else:
+                arrays.append(pa.array(self._codes(column, values, present), pa.int32()))
+        self.rows += len(chunk)
+        return pa.RecordBatch.from_arrays(arrays, names=self.columns)
+
+    def _check(self, column, parsed, present, kind):
+        bad = int((present & ~parsed).sum())
+        if bad:
+            raise ValueError(f'{column}: {bad} value(s) near row {self.rows + 1:,} could not be read as {kind}')
+
+    def _track_numbers(self, column, parsed, known):
+        if not known.all() or not np.array_equal(parsed, np.floor(parsed)):
+            self.whole[column] = False
+        if known.any():
+            self.lows[column] = min(self.lows.get(column, np.inf), np.nanmin(parsed))
+            self.highs[column] = max(self.highs.get(column, -np.inf), np.nanmax(parsed))
+
+    def _codes(self, column, values, present):
+        # Excel cells can mix numbers into text columns; compare everything as text
+        values = values.astype(object).astype(str).where(present, None)
+        local_codes, uniques = pd.factorize(values)
+        dictionary = self.dictionaries[column]
+        lookup = np.array([dictionary.setdefault(value, len(dictionary)) for value in uniques], dtype=np.int32)
+        codes = np.full(len(values), -1, dtype=np.int32)
+        found = local_codes >= 0
+        codes[found] = lookup[local_codes[found]]
+        return codes
+
+    def final_schema(self, metadata):
+        self._ranks = {}
+        self._sorted_values = {}
+        fields = []
+        for column in self.columns:
+            kind = self.kinds[column]
+            if kind == 'date':
+                fields.append(pa.field(column, pa.timestamp('ns')))
+            elif kind == 'number':
+                fields.append(pa.field(column, self._number_type(column)))
+            else:
+                values = list(self.dictionaries[column])
+                order = sorted(range(len(values)), key=values.__getitem__)
+                ranks = np.empty(len(values) + 1, dtype=np.int32)
+                ranks[order] = np.arange(len(values), dtype=np.int32)
+                ranks[-1] = -1  # code -1 (missing) indexes the last slot
+                self._ranks[column] = ranks
+                self._sorted_values[column] = pa.array([values[i] for i in order], pa.string())
+                if column in DIMENSIONS or len(values) <= CATEGORICAL_MAX_RATIO * max(self.rows, 1):
+                    fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+                else:
+                    fields.append(pa.field(column, pa.string()))
+        return pa.schema(fields, metadata=metadata)
+
+    def _number_type(self, column):
+        if not self.whole[column] or column not in self.lows:
+            return pa.float64()
+        for dtype in (np.int8, np.int16, np.int32, np.int64):
+            info = np.iinfo(dtype)
+            if info.min <= self.lows[column] and self.highs[column] <= info.max:
+                return pa.from_numpy_dtype(dtype)
+        return pa.float64()
+
+    def finalize(self, batch, schema):
+        arrays = []
+        for field in schema:
+            column = batch.column(field.name)
+            if self.kinds[field.name] != 'text':
+                arrays.append(column.cast(field.type))
+                continue
+            codes = self._ranks[field.name][column.to_numpy()]
+            indices = pa.array(codes, pa.int32(), mask=codes < 0)
+            encoded = pa.DictionaryArray.from_arrays(indices, self._sorted_values[field.name])
+            if not pa.types.is_dictionary(field.type):
+                encoded = encoded.dictionary_decode()
+            arrays.append(encoded)
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _cache_file_name(digest, sheet_name):
+    suffix = sheet_name or 'csv'
+    return f'v{CACHE_VERSION}-{digest}-{suffix}.feather'
+
+
+def _manifest_path(cache_dir):
+    return os.path.join(cache_dir, 'manifest.json')
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(_manifest_path(cache_dir)) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(cache_dir, manifest):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _manifest_path(cache_dir)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def cached_table_path(source_path, sheet_name=DEFAULT_SHEET, cache_dir=CACHE_DIR):
+    """Return the columnar cache file for a source, converting it first if needed.
+
+    The manifest remembers the mtime and size seen for each source, so the common
+    case is a single ``os.stat``. The file is only hashed when those change, and only
+    re-parsed when the content hash itself is new.
+    """
+    if str(source_path).endswith('.csv'):
+        sheet_name = None
+    stat = os.stat(source_path)
+    manifest = _read_manifest(cache_dir)
+    entry_key = f'{os.path.abspath(source_path)}::{sheet_name or ""}'
+    entry = manifest.get(entry_key)
+
+    if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+        cache_path = os.path.join(cache_dir, _cache_file_name(entry['digest'], sheet_name))
+        if os.path.exists(cache_path):
+            return cache_path
+
+    digest = file_digest(source_path)
+    cache_path = os.path.join(cache_dir, _cache_file_name(digest, sheet_name))
+    if not os.path.exists(cache_path):
+        stream_convert(source_path, cache_path, sheet_name)
+
+    manifest[entry_key] = {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'digest': digest,
+    }
+    _write_manifest(cache_dir, manifest)
+    return cache_path
+
+
+def cached_upload_path(content, file_name, cache_dir=CACHE_DIR, progress=None):
+    """Return the columnar cache file for uploaded bytes, converting them on first sight.
+
+    Uploads have no stable path or mtime, so they are keyed on the content hash alone;
+    re-uploading the same file in any session reuses the earlier conversion, which is
+    streamed (see :func:`stream_convert`) and reports to ``progress``.
+    """
+    # Uploaded workbooks are read from their first sheet
+    is_csv = file_name.endswith('.csv')
+    digest = hashlib.sha1(content).hexdigest()
+    cache_path = os.path.join(cache_dir, _cache_file_name(digest, None if is_csv else 'sheet0'))
+    if not os.path.exists(cache_path):
+        stream_convert(io.BytesIO(content), cache_path, None if is_csv else 0,
+                       file_name=file_name, progress=progress)
+    return cache_path
+
+
+def load_dataset(source_path, sheet_name=DEFAULT_SHEET, cache_dir=CACHE_DIR):
+    """Load a source through the columnar cache, converting it on first use."""
+    return read_cache(cached_table_path(source_path, sheet_name, cache_dir))
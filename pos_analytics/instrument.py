@@ -0,0 +1,126 @@
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# The recorder collecting stages for the current script run (one per thread/context)
+_current = contextvars.ContextVar('pos_analytics_recorder', default=None)
+
+# tracemalloc is process-wide: it runs while any recorder traces memory
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+class Recorder:
+    """Wall time, rows and peak memory for each stage of one dashboard rerun.
+
+    Stages nest: a stage opened while another is running is recorded with a greater
+    ``depth``. Peak memory is only measured when ``trace_memory`` is set, because
+    tracemalloc slows Python down noticeably; it is the peak Python allocation above
+    the stage's starting point, nested stages included. Tracing is process-wide, so
+    sessions rendering at the same time add to each other's peaks.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.started = time.time()
+        self._clock = time.perf_counter()
+        self._stack = []
+
+    @contextlib.contextmanager
+    def stage(self, name, **info):
+        entry = {'stage': name, 'depth': len(self._stack), **info}
+        self.stages.append(entry)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            for parent in self._stack:
+                parent['_peak'] = max(parent['_peak'], peak)
+            tracemalloc.reset_peak()
+            entry['_start'], entry['_peak'] = current, current
+        self._stack.append(entry)
+        started = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry['seconds'] = time.perf_counter() - started
+            self._stack.pop()
+            if tracing and tracemalloc.is_tracing():
+                _, peak = tracemalloc.get_traced_memory()
+                for open_entry in self._stack + [entry]:
+                    open_entry['_peak'] = max(open_entry['_peak'], peak)
+                entry['peak_bytes'] = entry.pop('_peak') - entry.pop('_start')
+
+    def elapsed(self):
+        """Seconds since the recorder was created, i.e. since the rerun started."""
+        return time.perf_counter() - self._clock
+
+    def top_level(self):
+        """Seconds per outermost stage name, in the order they first ran."""
+        totals = {}
+        for entry in self.stages:
+            if entry['depth'] == 0:
+                totals[entry['stage']] = totals.get(entry['stage'], 0) + entry.get('seconds', 0)
+        return totals
+
+    def records(self):
+        """The recorded stages as plain dicts, in the order they started."""
+        return [
+            {key: value for key, value in entry.items() if not key.startswith('_')}
+            for entry in self.stages
+        ]
+
+    def export(self, path, **context):
+        """Append this run as one JSON line to ``path`` (``context`` is stored alongside)."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        line = {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'total_seconds': self.elapsed(),
+            **context,
+            'stages': self.records(),
+        }
+        with open(path, 'a') as handle:
+            handle.write(json.dumps(line, default=str) + '\n')
+
+
+@contextlib.contextmanager
+def recording(recorder):
+    """Make ``recorder`` receive the stages reported by this package while active."""
+    global _tracing_users
+    if recorder.trace_memory:
+        with _tracing_lock:
+            _tracing_users += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+        if recorder.trace_memory:
+            with _tracing_lock:
+                _tracing_users -= 1
+                if not _tracing_users:
+                    tracemalloc.stop()
+
+
+def current_recorder():
+    return _current.get()
+
+
+@contextlib.contextmanager
+def stage(name, **info):
+    """Record a stage in the active recorder; a no-op when nothing is recording.
+
+    Yields a dict the caller may add details to (e.g. ``rows``).
+    """
+    recorder = _current.get()
+    if recorder is None:
+        yield {}
+        return
+    with recorder.stage(name, **info) as entry:
+        yield entry
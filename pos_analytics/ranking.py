@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+# Columns identifying a ranked product; a filter on these alone keeps or drops whole
+# products, so the precomputed order still applies
+PRODUCT_KEYS = ['category', 'subcategory', 'product_name']
+
+# Metrics products can be ranked by: totals, the mean profit margin over order
+# lines and turnover (sales per unit sold)
+RANK_METRICS = ['sales', 'profit', 'quantity', 'profit_margin', 'turnover']
+
+# Columns of a ranking table
+RANKING_COLUMNS = PRODUCT_KEYS + RANK_METRICS
+
+# Values equal to this many decimals rank as ties, so totals summed in a different
+# order (by the index or by a roll-up) still rank the same
+RANK_DECIMALS = 6
+
+
+class ProductRanking:
+    """Lifetime totals per product, kept in sorted order for every ranking metric.
+
+    Each metric keeps two orders, best first for the top and for the bottom, both
+    breaking ties by ascending product id (see :func:`rank_order`), so ties come out
+    the same however the order was reached. Top or bottom N over every product is a slice
+    of an order; under a product filter (category, subcategory or product) the
+    order is walked until N matching products are found, so neither touches the
+    other products or any rows. Appends update the totals of the products they
+    touch and move just those products within each order.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._ids = {}
+        self._keys = np.empty((0, len(PRODUCT_KEYS)), dtype=np.int64)
+        self._totals = {column: np.zeros(0) for column in ['sales', 'profit', 'quantity', 'lines', 'margin']}
+        self._add(frame, 0)
+        dates = frame['order_date']
+        self.first_date, self.last_date = dates.min(), dates.max()
+        self._orders = {}
+        for metric in RANK_METRICS:
+            for bottom in (False, True):
+                self._orders[metric, bottom] = rank_order(self.metric(metric), np.arange(len(self._keys)), bottom)
+
+    def extended(self, frame, start):
+        """A new ranking for ``frame``, whose rows from ``start`` on were just appended."""
+        ranking = ProductRanking.__new__(ProductRanking)
+        ranking.frame = frame
+        ranking._ids = dict(self._ids)
+        ranking._keys = self._keys
+        ranking._totals = {column: values.copy() for column, values in self._totals.items()}
+        changed = ranking._add(frame, start)
+        dates = frame['order_date'].iloc[start:]
+        ranking.first_date = min(self.first_date, dates.min()) if len(dates) else self.first_date
+        ranking.last_date = max(self.last_date, dates.max()) if len(dates) else self.last_date
+        ranking._orders = {
+            (metric, bottom): _reposition(order, _sort_keys(ranking.metric(metric), bottom), changed)
+            for (metric, bottom), order in self._orders.items()
+        }
+        return ranking
+
+    def metric(self, metric):
+        """``metric`` per product id."""
+        totals = self._totals
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if metric == 'profit_margin':
+                return totals['margin'] / totals['lines']
+            if metric == 'turnover':
+                return totals['sales'] / totals['quantity']
+        return totals[metric]
+
+    def covers(self, spec):
+        """Whether ``spec`` keeps or drops whole products, leaving their totals unchanged."""
+        if spec is None:
+            return True
+        if spec.start is not None and spec.start > self.first_date:
+            return False
+        if spec.end is not None and spec.end < self.last_date:
+            return False
+        return all(dimension in PRODUCT_KEYS for dimension, _ in spec.selections)
+
+    def top(self, metric='sales', n=5, bottom=False, spec=None):
+        """The ``n`` products with the highest (or lowest) ``metric`` under ``spec``,
+        which must be :meth:`covered <covers>`. Products without a value are left out."""
+        if metric not in RANK_METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; choose from {', '.join(RANK_METRICS)}")
+        order = self._orders[metric, bottom]
+        wanted = self._matching(spec) & ~np.isnan(self.metric(metric))
+        picked, step, position = [], max(4 * n, 64), 0
+        while len(picked) < n and position < len(order):
+            chunk = order[position:position + step]
+            picked.extend(chunk[wanted[chunk]][:n - len(picked)])
+            position += step
+            step *= 2
+        return self.table(np.array(picked, dtype=np.int64))
+
+    def table(self, ids):
+        """The ranking columns for product ``ids``, in the order given."""
+        columns = {}
+        for position, column in enumerate(PRODUCT_KEYS):
+            categories = self.frame[column].cat.categories
+            columns[column] = pd.Categorical.from_codes(self._keys[ids, position], categories)
+        for metric in RANK_METRICS:
+            columns[metric] = self.metric(metric)[ids]
+        return pd.DataFrame(columns)
+
+    def ids_of(self, products):
+        """Product ids of the rows of ``products``, a frame with the ``PRODUCT_KEYS`` columns."""
+        codes = np.column_stack([
+            products[column].cat.codes.to_numpy().astype(np.int64) for column in PRODUCT_KEYS
+        ])
+        return np.array([self._ids[key] for key in map(tuple, codes)], dtype=np.int64)
+
+    def _matching(self, spec):
+        wanted = np.ones(len(self._keys), dtype=bool)
+        for dimension, values in (spec.selections if spec is not None else ()):
+            position = PRODUCT_KEYS.index(dimension)
+            codes = self.frame[dimension].cat.categories.get_indexer(list(values))
+            wanted &= np.isin(self._keys[:, position], codes[codes >= 0])
+        return wanted
+
+    def _add(self, frame, start):
+        # Fold rows from ``start`` on into the totals; returns the product ids touched
+        rows = frame.iloc[start:]
+        if not len(rows):
+            return np.empty(0, dtype=np.int64)
+        combined = np.zeros(len(rows), dtype=np.int64)
+        widths = []
+        for column in PRODUCT_KEYS:
+            width = len(rows[column].cat.categories) + 1
+            combined = combined * width + rows[column].cat.codes.to_numpy() + 1
+            widths.append(width)
+        inverse, uniques = pd.factorize(combined)
+        parts = []
+        for width in reversed(widths):
+            uniques, codes = np.divmod(uniques, width)
+            parts.append(codes - 1)
+        keys = np.column_stack(parts[::-1])
+
+        ids = np.empty(len(keys), dtype=np.int64)
+        added = []
+        for position, key in enumerate(map(tuple, keys)):
+            if key not in self._ids:
+                self._ids[key] = len(self._ids)
+                added.append(key)
+            ids[position] = self._ids[key]
+        if added:
+            self._keys = np.concatenate([self._keys, np.array(added, dtype=np.int64)])
+        n = len(self._keys)
+        row_ids = ids[inverse]
+        values = {
+            'sales': rows['sales'].to_numpy(dtype=np.float64),
+            'profit': rows['profit'].to_numpy(dtype=np.float64),
+            'quantity': rows['quantity'].to_numpy(dtype=np.float64),
+            'lines': np.ones(len(rows)),
+            'margin': rows['profit_margin'].to_numpy(dtype=np.float64),
+        }
+        for column, weights in values.items():
+            totals = np.concatenate([self._totals[column], np.zeros(n - len(self._totals[column]))])
+            self._totals[column] = totals + np.bincount(row_ids, weights=weights, minlength=n)
+        return np.unique(ids)
+
+
+def rank_order(values, ids, bottom=False):
+    """Positions of ``values`` from best to worst, highest first unless ``bottom``.
+
+    Ties (equal to ``RANK_DECIMALS``) go to the lower product id, and missing
+    values come last. Both ranking
+    paths order products this way, so a query gives the same products either way.
+    """
+    return np.lexsort((ids, _sort_keys(values, bottom)))
+
+
+def _sort_keys(values, bottom=False):
+    # Ascending keys in ranking order; products without a value sort last
+    values = np.round(np.asarray(values, dtype=np.float64), RANK_DECIMALS)
+    return np.where(np.isnan(values), np.inf, values if bottom else -values)
+
+
+def _reposition(order, values, changed):
+    # Take the changed (or new) ids out of a (value, id)-sorted order and insert them
+    # back where their new values belong
+    kept = order[~np.isin(order, changed)]
+    changed = changed[np.lexsort((changed, values[changed]))]
+    kept_values = values[kept]
+    slots = np.searchsorted(kept_values, values[changed], 'left')
+    ties = np.searchsorted(kept_values, values[changed], 'right')
+    for position in np.flatnonzero(ties > slots):
+        # Equal values: ids stay in ascending order
+        lo, hi = slots[position], ties[position]
+        slots[position] = lo + np.searchsorted(kept[lo:hi], changed[position])
+    return np.insert(kept, slots, changed)
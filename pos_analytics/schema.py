@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+# Columns every page of the dashboard reads; uploads must provide all of them
+REQUIRED_COLUMNS = [
+    'order_date', 'customer', 'product_name', 'segment', 'category', 'subcategory',
+    'region', 'city', 'state', 'discount', 'profit', 'quantity', 'sales', 'profit_margin',
+]
+
+# Dimension columns the sidebar filters and the pages group by
+DIMENSIONS = [
+    'category', 'region', 'product_name', 'segment', 'subcategory', 'state', 'city', 'customer',
+]
+
+# Other text columns are dictionary-encoded too when most of their values repeat
+CATEGORICAL_MAX_RATIO = 0.5
+
+
+def memory_bytes(frame):
+    """Deep memory footprint of a frame in bytes."""
+    return int(frame.memory_usage(deep=True).sum())
+
+
+def apply_schema(frame):
+    """Cast a freshly parsed frame to the compact dashboard schema.
+
+    Dimension columns become Categoricals with lexically sorted categories, so the
+    category list doubles as the sidebar option list. Integer columns are downcast to
+    the smallest type that holds them. Float columns stay float64 because sales and
+    profit totals are shown to the cent.
+
+    Returns the converted frame and a report of the memory used before and after.
+    """
+    before = memory_bytes(frame)
+    frame = frame.copy()
+
+    for column in frame.columns:
+        series = frame[column]
+        if column in DIMENSIONS:
+            frame[column] = _as_sorted_category(series)
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if series.nunique() <= CATEGORICAL_MAX_RATIO * max(len(series), 1):
+                frame[column] = _as_sorted_category(series)
+        elif pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            frame[column] = pd.to_numeric(series, downcast='integer')
+
+    report = {'bytes_before': before, 'bytes_after': memory_bytes(frame)}
+    return frame, report
+
+
+def conform(batch, reference):
+    """Check a batch of new rows against an existing frame and cast it to match.
+
+    The batch may not introduce columns and must carry every required column;
+    other missing columns are filled with nulls. Categorical columns keep the
+    reference categories in order, with unseen values appended (sorted), so codes
+    already stored for the reference rows stay valid. Integer columns are widened
+    when the batch holds values the reference dtype cannot. Every row needs an
+    order_date, since appended rows are stored and indexed by order month.
+
+    Raises ``ValueError`` describing every problem found.
+    """
+    problems = []
+    unknown = [column for column in batch.columns if column not in reference.columns]
+    if unknown:
+        problems.append(f"unknown columns: {', '.join(map(str, unknown))}")
+    missing = [column for column in REQUIRED_COLUMNS if column not in batch.columns]
+    if missing:
+        problems.append(f"missing required columns: {', '.join(missing)}")
+    if problems:
+        raise ValueError('; '.join(problems))
+
+    conformed = {}
+    for column in reference.columns:
+        dtype = reference[column].dtype
+        if column not in batch.columns:
+            values = pd.Series(pd.NA, index=batch.index, dtype=object)
+        else:
+            values = batch[column]
+        try:
+            conformed[column] = _conform_column(values, dtype)
+        except ValueError as error:
+            problems.append(f'{column}: {error}')
+    if 'order_date' in conformed:
+        undated = int(conformed['order_date'].isna().sum())
+        if undated:
+            problems.append(f'order_date: {undated} row(s) have no order date')
+    if problems:
+        raise ValueError('; '.join(problems))
+    return pd.DataFrame(conformed, index=batch.index)
+
+
+def _conform_column(values, dtype):
+    present = values.notna()
+    if isinstance(dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+        values = values.where(~present, values.astype(str))
+        new = sorted(set(values[present]) - set(dtype.categories))
+        return values.astype(pd.CategoricalDtype(list(dtype.categories) + new))
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        parsed = pd.to_datetime(values, errors='coerce')
+        _check_parsed(parsed, present, 'dates')
+        return parsed.astype(dtype)
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        parsed = pd.to_numeric(values, errors='coerce')
+        _check_parsed(parsed, present, 'numbers')
+        if pd.api.types.is_integer_dtype(dtype):
+            known = parsed.dropna()
+            if (known != known.round()).any():
+                raise ValueError('expected whole numbers')
+            if len(known) < len(parsed):
+                # Integer columns cannot hold nulls; fall back to floats
+                return parsed.astype(np.promote_types(dtype, np.float64))
+            needed = pd.to_numeric(parsed.astype('int64'), downcast='integer').dtype
+            return parsed.astype(np.promote_types(dtype, needed))
+        return parsed.astype(dtype)
+    return values.astype(dtype)
+
+
+def _check_parsed(parsed, present, kind):
+    bad = int((parsed.isna() & present).sum())
+    if bad:
+        raise ValueError(f'{bad} value(s) could not be read as {kind}')
+
+
+def _as_sorted_category(series):
+    # Excel cells can mix numbers into text columns; compare everything as text
+    values = series.astype(object)
+    values = values.where(values.isna(), values.astype(str))
+    return values.astype(pd.CategoricalDtype(sorted(values.dropna().unique())))
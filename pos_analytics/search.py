@@ -0,0 +1,148 @@
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Matches offered by a search picker at a time
+DEFAULT_MATCHES = 100
+
+# Longest substrings indexed by a SearchIndex; longer queries intersect their n-grams
+NGRAM = 3
+
+# Parent dimensions of each dimension, nearest first; pickers for a child only offer
+# values found under the selected parents
+HIERARCHY = {
+    'subcategory': ['category'],
+    'product_name': ['subcategory', 'category'],
+    'state': ['region'],
+    'city': ['state', 'region'],
+}
+
+
+class SearchIndex:
+    """Case-insensitive prefix and substring search over a column's distinct values.
+
+    Values are kept in alphabetical order with an inverted index from every
+    substring of up to ``NGRAM`` characters to the positions of the values holding
+    it. A query that short is answered by one posting list; a longer one
+    intersects the lists of its n-grams and checks only the values left. Matches
+    are ranked: values starting with the query first, then values with a word
+    starting with it, then any other values containing it, alphabetically within
+    each group. The last ``memo_size`` searches are kept, because a rerun repeats
+    the search the user typed last.
+    """
+
+    def __init__(self, values, memo_size=64):
+        lowered = [str(value).lower() for value in values]
+        order = sorted(range(len(lowered)), key=lowered.__getitem__)
+        self.values = pd.Index([values[position] for position in order])
+        self.memo_size = memo_size
+        self._lowered = pd.Series([lowered[position] for position in order], dtype=object)
+        postings = defaultdict(list)
+        for position, text in enumerate(self._lowered):
+            grams = {text[i:i + n] for n in range(1, NGRAM + 1) for i in range(len(text) - n + 1)}
+            for gram in grams:
+                postings[gram].append(position)
+        self._postings = {gram: np.array(positions, dtype=np.int64) for gram, positions in postings.items()}
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def search(self, query, k=DEFAULT_MATCHES, within=None, scope=None):
+        """Up to ``k`` values matching ``query``, best first.
+
+        ``within`` restricts the search to the given values (e.g. the products of
+        the selected subcategories); it may be a function returning them, which is
+        only called when the result is not memoized. ``scope`` is a hashable key
+        standing for ``within`` in the memo, such as the selections it comes from;
+        restricted searches without one are not memoized. An empty query returns
+        the first ``k`` values in alphabetical order.
+        """
+        query = query.strip().lower()
+        key = (query, k, scope)
+        memoize = within is None or scope is not None
+        if memoize:
+            with self._lock:
+                if key in self._memo:
+                    self._memo.move_to_end(key)
+                    return self._memo[key]
+
+        positions = self._matches(query)
+        if within is not None:
+            within = within() if callable(within) else within
+            allowed = np.sort(self.values.get_indexer(list(within)))
+            allowed = allowed[allowed >= 0]
+            positions = allowed if positions is None else np.intersect1d(positions, allowed, assume_unique=True)
+        if positions is None:
+            positions = np.arange(min(k, len(self.values))) if not query else np.arange(len(self.values))
+        if query:
+            candidates = self._lowered.iloc[positions]
+            # 0: the value starts with the query, 1: a word in it does, 2: it is elsewhere
+            rank = np.where(candidates.str.startswith(query).to_numpy(), 0, 2)
+            if query[0].isalnum():
+                word_start = candidates.str.contains(r'\b' + re.escape(query)).to_numpy()
+                rank = np.where((rank == 2) & word_start, 1, rank)
+            positions = positions[np.argsort(rank, kind='stable')]
+        result = list(self.values[positions[:k]])
+
+        if memoize:
+            with self._lock:
+                self._memo[key] = result
+                while len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+        return result
+
+    def _matches(self, query):
+        # Sorted positions of the values containing ``query``; None for an empty query
+        if not query:
+            return None
+        if len(query) <= NGRAM:
+            return self._postings.get(query, np.empty(0, dtype=np.int64))
+        grams = {query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)}
+        lists = sorted((self._postings.get(gram, np.empty(0, dtype=np.int64)) for gram in grams), key=len)
+        positions = lists[0]
+        for other in lists[1:]:
+            if not len(positions):
+                break
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        # Every n-gram occurring does not mean they occur in sequence
+        found = self._lowered.iloc[positions].str.contains(query, regex=False).to_numpy()
+        return positions[found]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class HierarchyMap:
+    """Which values of a child dimension occur under each value of its parent.
+
+    Built in one pass over the two columns' category codes, so narrowing a picker to
+    the selected parents never rescans the rows.
+    """
+
+    def __init__(self, parent, child):
+        parent, child = _as_category(parent), _as_category(child)
+        self.parents = pd.Index(parent.cat.categories.astype(str))
+        self.children = pd.Index(child.cat.categories.astype(str))
+        parent_codes = parent.cat.codes.to_numpy().astype(np.int64)
+        child_codes = child.cat.codes.to_numpy().astype(np.int64)
+        present = (parent_codes >= 0) & (child_codes >= 0)
+        # Each distinct (parent, child) pair once, sorted by parent
+        pairs = np.unique(parent_codes[present] * len(self.children) + child_codes[present])
+        pair_parents, self._child_codes = np.divmod(pairs, max(len(self.children), 1))
+        self._bounds = np.searchsorted(pair_parents, np.arange(len(self.parents) + 1))
+
+    def children_of(self, values):
+        """Sorted child values found under any of the parent ``values``."""
+        codes = self.parents.get_indexer([str(value) for value in values])
+        parts = [self._child_codes[self._bounds[code]:self._bounds[code + 1]] for code in codes if code >= 0]
+        if not parts:
+            return []
+        return sorted(self.children[np.unique(np.concatenate(parts))])
+
+
+def _as_category(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    return series.astype(object).where(series.isna(), series.astype(str)).astype('category')
@@ -0,0 +1,273 @@
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from .analyses import ANALYSES
+from .cube import DISCOUNT_KEY, GRAIN, MEASURES, SUM_MEASURES, TIME_KEYS
+
+# Engines that can answer aggregate queries; 'pandas' rolls up the in-memory cube
+BACKENDS = ['pandas', 'sqlite', 'duckdb']
+
+# Backend used when none is chosen, e.g. POS_BACKEND=sqlite streamlit run ...
+DEFAULT_BACKEND = os.environ.get('POS_BACKEND', 'pandas')
+
+# Columns the aggregate queries read; only these are copied into SQLite
+SQL_COLUMNS = GRAIN + SUM_MEASURES
+
+# Dtypes of the cube's summed measures; integer sums are widened to int64
+MEASURE_DTYPES = {'quantity': 'int64', 'count': 'int64'}
+
+# Rows per insert when copying the columnar cache into SQLite
+SQLITE_BATCH_ROWS = 100_000
+
+# Time keys per dialect; weekdays count from Monday = 0, as in pandas
+TIME_SQL = {
+    'sqlite': {
+        'year': "CAST(strftime('%Y', order_date) AS INTEGER)",
+        'month': "CAST(strftime('%m', order_date) AS INTEGER)",
+        'day': 'date(order_date)',
+        'hour': "CAST(strftime('%H', order_date) AS INTEGER)",
+        'weekday': "(CAST(strftime('%w', order_date) AS INTEGER) + 6) % 7",
+    },
+    'duckdb': {
+        'year': 'year(order_date)',
+        'month': 'month(order_date)',
+        'day': "date_trunc('day', order_date)",
+        'hour': 'hour(order_date)',
+        'weekday': 'isodow(order_date) - 1',
+    },
+}
+
+# Whole-percent discount codes, rounded half up like discount_codes; SQLite's CAST
+# truncates, DuckDB's rounds
+DISCOUNT_SQL = {
+    'sqlite': 'CAST(discount * 100 + 0.5 AS INTEGER)',
+    'duckdb': 'CAST(floor(discount * 100 + 0.5) AS INTEGER)',
+}
+
+# SQLite stores order_date as sortable text
+SQLITE_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class SqlEngine:
+    """Aggregate queries pushed down to an embedded SQL engine over the columnar cache.
+
+    A drop-in for :class:`~pos_analytics.cube.Cube` behind the aggregation service:
+    the filter spec becomes a WHERE clause and the group keys a GROUP BY, so only
+    the aggregated result is brought into pandas. DuckDB scans the memory-mapped
+    cache file in place; SQLite reads a copy made once next to the cache file, with
+    an index per filter column. Rows appended after the cache was written live in a
+    temporary table that every query reads along with the cache.
+
+    Results match ``Cube.rollup``: same columns, dtypes and row order, with dates
+    filtered on the hour-truncated order_date. Queries on one engine run one at a
+    time because neither connection may be used from two threads at once.
+
+    This only routes aggregate queries. The dataset still loads the full frame,
+    which the filter indexes, option lists, customer index and row-level views
+    read, so a SQL backend does not let a history larger than memory be opened.
+    """
+
+    def __init__(self, backend, connection, dtypes, base_rows, rows, lock):
+        self.backend = backend
+        self.connection = connection
+        self.dtypes = dtypes
+        self.base_rows = base_rows
+        self.rows = rows
+        self._lock = lock
+
+    @classmethod
+    def open(cls, backend, cache_path, frame):
+        """An engine for ``frame``, whose leading rows are the ones in ``cache_path``."""
+        if backend == 'duckdb':
+            try:
+                import duckdb
+            except ImportError:
+                raise ValueError('The duckdb backend needs the duckdb package (pip install duckdb)') from None
+            connection = duckdb.connect()
+            table = feather.read_table(cache_path, columns=SQL_COLUMNS, memory_map=True)
+            connection.register('cache', table)
+            base_rows = table.num_rows
+        elif backend == 'sqlite':
+            db_path = sqlite_path(cache_path)
+            if not os.path.exists(db_path):
+                _build_sqlite(cache_path, db_path)
+            connection = sqlite3.connect(db_path, check_same_thread=False)
+            base_rows = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        else:
+            raise ValueError(f"Unknown SQL backend {backend!r}; choose from {', '.join(BACKENDS[1:])}")
+
+        columns = ', '.join(
+            f'CAST({column} AS TEXT) AS {column}' if _sql_type(column) == 'TEXT' and column != 'order_date'
+            else column
+            for column in SQL_COLUMNS
+        )
+        connection.execute(f'CREATE TEMP TABLE appended AS SELECT {columns} FROM cache LIMIT 0')
+        engine = cls(backend, connection, frame.dtypes, base_rows, base_rows, threading.Lock())
+        return engine.extended(frame, base_rows)
+
+    def extended(self, frame, start):
+        """A new engine for ``frame``, whose rows from ``start`` on were just appended.
+
+        The new rows are added to the shared temporary table, so engines made
+        earlier see them too.
+        """
+        batch = frame.iloc[start:]
+        if len(batch):
+            with self._lock:
+                self._insert(batch[SQL_COLUMNS])
+        return SqlEngine(self.backend, self.connection, frame.dtypes, self.base_rows, len(frame), self._lock)
+
+    def rollup(self, spec=None, by=(), measures=MEASURES):
+        """Aggregate the rows matching ``spec`` by the ``by`` keys, like ``Cube.rollup``."""
+        by = list(by)
+        needed = [measure for measure in SUM_MEASURES if measure in measures]
+        keys = [self._key_sql(key) for key in by]
+        columns = (
+            [f'{sql} AS {key}' for key, sql in zip(by, keys)]
+            + [self._sum_sql(measure) for measure in needed]
+            + ['CAST(COUNT(*) AS BIGINT) AS "count"']
+        )
+        where, params = self._where(spec)
+        sql = f"SELECT {', '.join(columns)} FROM {self._source()}{where}"
+        if by:
+            sql += f" GROUP BY {', '.join(keys)}"
+        with self._lock:
+            if self.backend == 'duckdb':
+                result = self.connection.execute(sql, params).df()
+            else:
+                result = pd.read_sql_query(sql, self.connection, params=params)
+
+        # Rows without a key value are left out, as pandas groupby does
+        result = result.dropna(subset=by).astype({key: self._key_dtype(key) for key in by})
+        # DuckDB widens integer sums to HUGEINT, which pandas receives as float64
+        result = result.astype({
+            measure: MEASURE_DTYPES.get(measure, 'float64') for measure in needed + ['count']
+        })
+        if by:
+            result = result.sort_values(by, kind='stable').reset_index(drop=True)
+        if 'profit_margin' in measures:
+            result['profit_margin'] = result['profit_margin'] / result['count']
+        return result[by + [measure for measure in MEASURES if measure in measures]]
+
+    def _sum_sql(self, measure):
+        total = f'COALESCE(SUM({measure}), 0)'
+        if _sql_type(measure) == 'INTEGER':
+            total = f'CAST({total} AS BIGINT)'
+        return f'{total} AS {measure}'
+
+    def _source(self):
+        if self.rows == self.base_rows:
+            return 'cache'
+        columns = ', '.join(SQL_COLUMNS)
+        return f'(SELECT {columns} FROM cache UNION ALL SELECT {columns} FROM appended)'
+
+    def _key_sql(self, key):
+        if key in TIME_KEYS:
+            return TIME_SQL[self.backend][key]
+        if key == DISCOUNT_KEY:
+            code = DISCOUNT_SQL[self.backend]
+            return f'CASE WHEN discount * 100 + 0.5 >= 0 AND discount * 100 + 0.5 < 101 THEN {code} ELSE -1 END'
+        return key
+
+    def _key_dtype(self, key):
+        if key in TIME_KEYS:
+            return TIME_KEYS[key](pd.Series([], dtype=self.dtypes['order_date'])).dtype
+        if key == DISCOUNT_KEY:
+            return 'int8'
+        return self.dtypes[key]
+
+    def _where(self, spec):
+        clauses, params = [], []
+        if spec is not None:
+            # The cube truncates order_date to the hour before filtering
+            if spec.start is not None:
+                clauses.append('order_date >= ?')
+                params.append(self._date(spec.start.ceil('h')))
+            if spec.end is not None:
+                clauses.append('order_date < ?')
+                params.append(self._date(spec.end.floor('h') + pd.Timedelta(hours=1)))
+            for dimension, values in spec.selections:
+                clauses.append(f"{dimension} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _date(self, timestamp):
+        if self.backend == 'sqlite':
+            return timestamp.strftime(SQLITE_DATE_FORMAT)
+        return timestamp.to_pydatetime()
+
+    def _insert(self, batch):
+        if self.backend == 'duckdb':
+            plain = batch.astype({
+                column: object for column, dtype in batch.dtypes.items()
+                if isinstance(dtype, pd.CategoricalDtype)
+            })
+            self.connection.register('batch', plain)
+            self.connection.execute(f"INSERT INTO appended SELECT {', '.join(SQL_COLUMNS)} FROM batch")
+            self.connection.unregister('batch')
+        else:
+            placeholders = ', '.join('?' * len(SQL_COLUMNS))
+            self.connection.executemany(f'INSERT INTO appended VALUES ({placeholders})', _sqlite_rows(batch))
+
+
+def sqlite_path(cache_path):
+    """The SQLite copy of a cache file; it carries the cache's content hash in its name."""
+    return os.path.splitext(cache_path)[0] + '.sqlite'
+
+
+def _build_sqlite(cache_path, db_path):
+    tmp_path = f'{db_path}.{os.getpid()}.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    table = feather.read_table(cache_path, columns=SQL_COLUMNS, memory_map=True)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        columns = ', '.join(f'{column} {_sql_type(column)}' for column in SQL_COLUMNS)
+        connection.execute(f'CREATE TABLE cache ({columns})')
+        placeholders = ', '.join('?' * len(SQL_COLUMNS))
+        for batch in table.to_batches(max_chunksize=SQLITE_BATCH_ROWS):
+            connection.executemany(f'INSERT INTO cache VALUES ({placeholders})', _sqlite_rows(batch.to_pandas()))
+        for column in GRAIN:
+            connection.execute(f'CREATE INDEX cache_{column} ON cache ({column})')
+        connection.commit()
+    finally:
+        connection.close()
+    # Atomic swap so concurrent sessions never open a half-built database
+    os.replace(tmp_path, db_path)
+
+
+def _sql_type(column):
+    if column == 'quantity':
+        return 'INTEGER'
+    if column in SUM_MEASURES or column == 'discount':
+        return 'REAL'
+    return 'TEXT'
+
+
+def _sqlite_rows(frame):
+    frame = frame.assign(order_date=frame['order_date'].dt.strftime(SQLITE_DATE_FORMAT)).astype(object)
+    return frame.where(frame.notna(), None).itertuples(index=False, name=None)
+
+
+def compare_backends(reference, candidate, specs):
+    """Run every analysis on two datasets and return where their results differ.
+
+    ``specs`` maps names to filter specs (``None`` for every row). Returns
+    ``(analysis, spec name, message)`` tuples; an empty list means the backends agree.
+    """
+    mismatches = []
+    for name, analysis in ANALYSES.items():
+        for spec_name, spec in specs.items():
+            expected = analysis(reference, spec)
+            actual = analysis(candidate, spec)
+            try:
+                pd.testing.assert_frame_equal(
+                    expected.reset_index(drop=True), actual.reset_index(drop=True), rtol=1e-9
+                )
+            except AssertionError as error:
+                mismatches.append((name, spec_name, str(error).strip().splitlines()[0]))
+    return mismatches
@@ -0,0 +1,130 @@
+import contextlib
+import json
+import os
+import time
+import uuid
+
+import pandas as pd
+
+from .ingest import DEFAULT_SHEET, cached_table_path, read_cache, read_source, write_cache
+from .schema import conform
+
+# Appended transactions are primary data, not a cache, so they live apart from it
+STORE_DIR = os.environ.get('POS_STORE_DIR', 'pos_store')
+
+
+class AppendStore:
+    """Batches of appended transactions for one source, partitioned by order month.
+
+    Each batch is split into one Feather file per ``order_month=YYYY-MM`` directory.
+    ``batches.json`` lists the batches in commit order with a sequence number, so a
+    reader that has applied batches up to ``seq`` only needs to read the ones after it.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    @classmethod
+    def for_source(cls, source_path, store_dir=STORE_DIR):
+        """The store holding batches appended to ``source_path``."""
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        return cls(os.path.join(store_dir, stem))
+
+    @property
+    def log_path(self):
+        return os.path.join(self.root, 'batches.json')
+
+    def batches(self):
+        """Every committed batch, oldest first."""
+        try:
+            with open(self.log_path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return []
+
+    def last_seq(self):
+        batches = self.batches()
+        return batches[-1]['seq'] if batches else 0
+
+    def append(self, batch):
+        """Write a conformed batch and commit it to the log; returns its log entry."""
+        if batch['order_date'].isna().any():
+            raise ValueError('every appended row needs an order_date to be stored by month')
+        batch_id = f'{time.strftime("%Y%m%dT%H%M%S")}-{uuid.uuid4().hex[:8]}'
+        months = batch['order_date'].dt.strftime('%Y-%m')
+        files = []
+        for month, part in batch.groupby(months, sort=True):
+            relative = os.path.join(f'order_month={month}', f'batch-{batch_id}.feather')
+            write_cache(part, os.path.join(self.root, relative))
+            files.append(relative)
+
+        # Files are written before the log entry, so readers never see a partial batch
+        with self._log_lock():
+            batches = self.batches()
+            entry = {
+                'seq': (batches[-1]['seq'] if batches else 0) + 1,
+                'id': batch_id,
+                'rows': len(batch),
+                'files': files,
+                'added_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            batches.append(entry)
+            tmp_path = f'{self.log_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as handle:
+                json.dump(batches, handle, indent=2)
+            os.replace(tmp_path, self.log_path)
+        return entry
+
+    @contextlib.contextmanager
+    def _log_lock(self, timeout=30):
+        # A lock file works the same on every platform; appends are rare and short
+        os.makedirs(self.root, exist_ok=True)
+        lock_path = f'{self.log_path}.lock'
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f'Timed out waiting for {lock_path}')
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            os.remove(lock_path)
+
+    def read_after(self, seq):
+        """Rows of every batch committed after ``seq`` and the last sequence number read."""
+        pending = [entry for entry in self.batches() if entry['seq'] > seq]
+        if not pending:
+            return None, seq
+        parts = [
+            read_cache(os.path.join(self.root, relative))
+            for entry in pending
+            for relative in entry['files']
+        ]
+        # Parts may carry different category sets; plain values concatenate cleanly
+        parts = [
+            part.astype({
+                column: object
+                for column in part.columns
+                if isinstance(part[column].dtype, pd.CategoricalDtype)
+            })
+            for part in parts
+        ]
+        return pd.concat(parts, ignore_index=True), pending[-1]['seq']
+
+
+def append_rows(source_path, rows, sheet_name=DEFAULT_SHEET, store_dir=STORE_DIR):
+    """Check new rows against a source's schema and commit them as one batch.
+
+    ``rows`` is a DataFrame or the path of a CSV, Excel or JSON-lines file.
+    Returns the batch's log entry; raises ``ValueError`` when the rows do not fit.
+    """
+    if not isinstance(rows, pd.DataFrame):
+        rows = read_source(rows, sheet_name=0)
+    reference = read_cache(cached_table_path(source_path, sheet_name))
+    batch = conform(rows, reference)
+    return AppendStore.for_source(source_path, store_dir).append(batch)
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+# Measures that can be summed over a window; profit_margin is a mean and cannot
+ADDITIVE_MEASURES = ['sales', 'profit', 'quantity', 'count']
+
+# Period aliases accepted for period-over-period comparisons, with periods per year
+PERIODS_PER_YEAR = {'D': 365, 'W': 52, 'M': 12, 'Q': 4, 'Y': 1}
+
+
+class TimeSeries:
+    """Daily totals of one measure on a dense calendar, kept as prefix sums.
+
+    ``daily`` holds a ``day`` column, the ``by`` group columns and the measure, e.g.
+    a cube roll-up by day. Days without rows count as zero, so the total over any
+    run of days is the difference of two prefix sums: every rolling window, running
+    total and period total costs O(1) per point, whatever its length, and all groups
+    are computed together.
+    """
+
+    def __init__(self, daily, measure, by=()):
+        self.measure = measure
+        self.by = list(by)
+        if daily.empty:
+            self.days = pd.DatetimeIndex([], name='day')
+            self.groups = daily[self.by].iloc[:0]
+            self._prefix = np.zeros((len(self.groups), 1))
+            return
+
+        self.days = pd.date_range(daily['day'].min(), daily['day'].max(), freq='D', name='day')
+        if self.by:
+            keys = daily.groupby(self.by, observed=True, sort=True).ngroup().to_numpy()
+            self.groups = daily[self.by].drop_duplicates().sort_values(self.by).reset_index(drop=True)
+        else:
+            keys = np.zeros(len(daily), dtype=np.int64)
+            self.groups = pd.DataFrame(index=range(1))
+        values = np.zeros((len(self.groups), len(self.days)))
+        np.add.at(values, (keys, (daily['day'] - self.days[0]).dt.days.to_numpy()), daily[measure].to_numpy())
+        # prefix[g, d] is the group's total over the first d days
+        self._prefix = np.zeros((len(self.groups), len(self.days) + 1))
+        np.cumsum(values, axis=1, out=self._prefix[:, 1:])
+
+    def total(self, start, end):
+        """Per-group totals over the days ``start`` to ``end``, both inclusive."""
+        lo = self._position(start, 'left')
+        hi = self._position(end, 'right')
+        return self._prefix[:, max(hi, lo)] - self._prefix[:, lo]
+
+    def values(self):
+        """Per-group daily totals, zero on days without rows."""
+        return np.diff(self._prefix, axis=1)
+
+    def rolling_sum(self, window, partial=False):
+        """Totals over the ``window`` days ending on each day.
+
+        Days before the first full window are NaN, or with ``partial`` the totals of
+        the days so far.
+        """
+        ends = np.arange(1, len(self.days) + 1)
+        sums = self._prefix[:, ends] - self._prefix[:, np.maximum(ends - window, 0)]
+        if not partial:
+            sums[:, :window - 1] = np.nan
+        return sums
+
+    def rolling_mean(self, window, partial=False):
+        """Daily averages over the ``window`` days ending on each day (see :meth:`rolling_sum`)."""
+        days = np.minimum(np.arange(1, len(self.days) + 1), window) if partial else window
+        return self.rolling_sum(window, partial) / days
+
+    def cumulative(self):
+        """Running totals from the first day."""
+        return self._prefix[:, 1:]
+
+    def shifted(self, values, days):
+        """``values`` as they were ``days`` earlier (NaN before the first day)."""
+        shifted = np.full(values.shape, np.nan)
+        if 0 < days < values.shape[1]:
+            shifted[:, days:] = values[:, :-days]
+        elif days == 0:
+            shifted = values.copy()
+        return shifted
+
+    def frame(self, **columns):
+        """A long frame of ``day``, the group columns and the given per-day arrays."""
+        groups = self.groups.loc[self.groups.index.repeat(len(self.days))].reset_index(drop=True)
+        return pd.concat([
+            pd.DataFrame({'day': np.tile(self.days.to_numpy(), len(self.groups))}),
+            groups,
+            pd.DataFrame({name: np.asarray(array).ravel() for name, array in columns.items()}),
+        ], axis=1)
+
+    def trend(self, window=7):
+        """Daily totals with a ``window``-day rolling sum and mean and the running total."""
+        return self.frame(**{
+            self.measure: self.values(),
+            f'rolling_{window}d_sum': self.rolling_sum(window),
+            f'rolling_{window}d_mean': self.rolling_mean(window),
+            'cumulative': self.cumulative(),
+        })
+
+    def resample(self, values, freq):
+        """Per-day ``values`` summed per period of ``freq``, and the period start dates."""
+        labels, starts = self._period_starts(freq)
+        if not len(starts):
+            return values[:, :0], labels
+        return np.add.reduceat(values, starts, axis=1), labels
+
+    def periods(self, freq='M'):
+        """Totals per calendar day, week, month, quarter or year, with the change on
+        the previous period and on the same period a year earlier.
+
+        ``days`` counts the period's days inside the series, so the partial first
+        and last periods can be told apart.
+        """
+        labels, starts = self._period_starts(freq)
+        bounds = np.r_[starts, len(self.days)]
+        totals = self._prefix[:, bounds[1:]] - self._prefix[:, bounds[:-1]]
+        previous = self.shifted(totals, 1)
+        last_year = self.shifted(totals, PERIODS_PER_YEAR[freq])
+        groups = self.groups.loc[self.groups.index.repeat(len(starts))].reset_index(drop=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return pd.concat([
+                pd.DataFrame({
+                    'period': np.tile(labels.to_numpy(), len(self.groups)),
+                    'days': np.tile(np.diff(bounds), len(self.groups)),
+                }),
+                groups,
+                pd.DataFrame({
+                    self.measure: totals.ravel(),
+                    'previous': previous.ravel(),
+                    'change': (totals - previous).ravel(),
+                    'change_pct': ((totals - previous) / np.abs(previous) * 100).ravel(),
+                    'last_year': last_year.ravel(),
+                    'yoy_change': (totals - last_year).ravel(),
+                    'yoy_pct': ((totals - last_year) / np.abs(last_year) * 100).ravel(),
+                }),
+            ], axis=1)
+
+    def _period_starts(self, freq):
+        # Start dates of the periods the days fall in, and each period's first position
+        if freq not in PERIODS_PER_YEAR:
+            raise ValueError(f"Unknown period {freq!r}; choose from {', '.join(PERIODS_PER_YEAR)}")
+        labels = self.days.to_period(freq)
+        starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]]) if len(labels) else np.empty(0, int)
+        return pd.DatetimeIndex(labels[starts].start_time, name='period'), starts
+
+    def _position(self, day, side):
+        # Days before position p are in prefix[:, p]
+        return int(np.searchsorted(self.days.to_numpy(), pd.Timestamp(day).normalize().to_datetime64(), side))
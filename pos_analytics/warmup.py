@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Jobs remembered per scheduler, so sessions asking for the same warm-up share it
+DEFAULT_MAX_JOBS = 16
+
+# Name prefix of the scheduler's worker threads
+THREAD_PREFIX = 'pos-warmup'
+
+
+class Cancelled(Exception):
+    """Raised by :meth:`WarmupJob.check` inside a task whose job was cancelled."""
+
+
+class WarmupJob:
+    """Named tasks run one after another in the background, in the order given.
+
+    Each task is called with the job, so long tasks can call :meth:`check` between
+    steps to stop early once the job is cancelled. What a task returns is kept in
+    ``results`` under its label; a failing task is recorded in ``errors`` instead
+    and the job moves on to the next one.
+    """
+
+    def __init__(self, key, tasks):
+        self.key = key
+        self.tasks = list(tasks)
+        self.done = 0
+        self.current = None
+        self.results = {}
+        self.errors = {}
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Stop after the current step; tasks not yet started are skipped."""
+        self._cancel.set()
+
+    def check(self):
+        """Raise :class:`Cancelled` if the job has been cancelled."""
+        if self._cancel.is_set():
+            raise Cancelled()
+
+    def progress(self):
+        """Tasks done and total, the running task and elapsed seconds."""
+        end = self.finished or time.perf_counter()
+        return {
+            'done': self.done,
+            'total': len(self.tasks),
+            'current': self.current,
+            'finished': self.finished is not None,
+            'cancelled': self.cancelled,
+            'errors': dict(self.errors),
+            'seconds': 0.0 if self.started is None else end - self.started,
+        }
+
+    def run(self):
+        self.started = time.perf_counter()
+        try:
+            for label, task in self.tasks:
+                if self.cancelled:
+                    break
+                self.current = label
+                try:
+                    self.results[label] = task(self)
+                except Cancelled:
+                    break
+                except Exception as error:
+                    self.errors[label] = f'{type(error).__name__}: {error}'
+                self.done += 1
+        finally:
+            self.current = None
+            self.finished = time.perf_counter()
+
+
+class WarmupScheduler:
+    """Runs warm-up jobs on a single background thread, one job at a time.
+
+    One worker keeps warm-ups from competing with each other for the interpreter;
+    queued jobs that are cancelled before they start finish immediately. Jobs are
+    shared by ``key``: submitting a key whose job is still live returns that job.
+    """
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=THREAD_PREFIX)
+
+    def submit(self, key, tasks):
+        """The job for ``key``, starting one with ``tasks`` if none is live.
+
+        ``tasks`` is a sequence of ``(label, function)`` pairs; each function is
+        called with the job.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.cancelled:
+                self._jobs.move_to_end(key)
+                return job
+            job = WarmupJob(key, tasks)
+            self._jobs[key] = job
+            while len(self._jobs) > self.max_jobs:
+                _, stale = self._jobs.popitem(last=False)
+                stale.cancel()
+        self._executor.submit(job.run)
+        return job
+
+    def get(self, key):
+        """The live job for ``key``, or ``None`` if there is none."""
+        with self._lock:
+            job = self._jobs.get(key)
+            return None if job is None or job.cancelled else job
+
+    def cancel_all(self):
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel()
+
+
+# Process-wide scheduler shared by every session
+scheduler = WarmupScheduler()
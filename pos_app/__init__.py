@@ -0,0 +1 @@
+"""Streamlit front end of the Point of Sale dashboard: shared core and analysis pages."""
@@ -0,0 +1,417 @@
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+from pos_analytics import (
+    DEFAULT_POINT_BUDGET,
+    DEFAULT_SCATTER_ROW_LIMIT,
+    AppendStore,
+    Dataset,
+    FilterSpec,
+    bucket_time_series,
+    cached_table_path,
+    cached_upload_path,
+    figure_cache,
+    lttb_time_series,
+)
+from pos_analytics.approx import refinements
+from pos_analytics.ingest import CACHE_DIR
+from pos_analytics.instrument import Recorder, stage
+from pos_analytics.warmup import scheduler
+
+file_path = 'superstore.xlsx'
+
+# Where profiled reruns are logged, one JSON line each
+PROFILE_LOG = os.environ.get('POS_PROFILE_LOG', os.path.join(CACHE_DIR, 'profile.jsonl'))
+
+# Define color palettes
+default_colors = px.colors.qualitative.Plotly
+time_series_colors = px.colors.qualitative.Set2
+color_palette = px.colors.qualitative.Set3
+
+
+@dataclass
+class PageContext:
+    """Everything an analysis page reads: the dataset, the filter state and chart settings.
+
+    ``filtered_df`` may be the shared dataset frame itself and ``aggregates`` results
+    are shared too, so pages derive new frames (e.g. with .assign) instead of editing them.
+    Matching rows are only gathered when a page reads ``filtered_df``; ``rows``,
+    ``row_count``, ``head`` and ``tail`` answer from the filter engine's row positions.
+    """
+    page: str
+    dataset: Dataset
+    filter_spec: FilterSpec
+    point_budget: int = DEFAULT_POINT_BUDGET
+    downsample_method: str = "Bucket totals (day/week/month)"
+    scatter_row_limit: int = DEFAULT_SCATTER_ROW_LIMIT
+    # Stages of this rerun; detailed (memory, payload sizes) when profiling is on
+    recorder: Recorder = field(default_factory=Recorder)
+    # Approximate mode: pages show estimates first, and ``pending`` collects the
+    # exact results still being computed for them in the background
+    approximate: bool = False
+    pending: list = field(default_factory=list)
+
+    @property
+    def df(self):
+        return self.dataset.frame
+
+    @property
+    def rows(self):
+        """Sorted positions of the rows matching the filters, or ``None`` for every row."""
+        return self.dataset.filters.positions(self.filter_spec)
+
+    @property
+    def row_count(self):
+        rows = self.rows
+        return len(self.dataset) if rows is None else len(rows)
+
+    @cached_property
+    def filtered_df(self):
+        """The rows matching the filters, gathered the first time a page reads them."""
+        return self.dataset.filters.select(self.filter_spec)
+
+    def head(self, n=5):
+        """The first ``n`` matching rows, without gathering the others."""
+        rows = self.rows
+        return self.df.head(n) if rows is None else self.df.take(rows[:n])
+
+    def tail(self, n=5):
+        """The last ``n`` matching rows, without gathering the others."""
+        rows = self.rows
+        return self.df.tail(n) if rows is None else self.df.take(rows[max(len(rows) - n, 0):])
+
+    @property
+    def aggregates(self):
+        # Charts read memoized roll-ups of the dataset's pre-aggregated cube instead of
+        # scanning raw rows
+        return self.dataset.aggregates
+
+    @property
+    def profiling(self):
+        return self.recorder.trace_memory
+
+    def plot(self, figure, **kwargs):
+        """``st.plotly_chart``, recorded as a stage with the payload size when profiling."""
+        with stage(f'chart: {figure.layout.title.text or ""}'.rstrip(': ')) as info:
+            if self.profiling:
+                info['payload_bytes'] = len(pio.to_json(figure, validate=False))
+            st.plotly_chart(figure, **kwargs)
+
+    def estimate_first(self, name, exact, estimate):
+        """``exact()`` and True, or in approximate mode ``estimate()`` and False while
+        ``exact()`` runs in the background; the page reruns once it is ready.
+
+        ``name`` identifies the value among those computed for the current filters.
+        """
+        if not self.approximate:
+            return exact(), True
+        dataset = self.dataset
+        key = (dataset.key, dataset.version, dataset.backend, self.filter_spec, name)
+        result, ready = refinements.get(key, exact)
+        if ready:
+            return result, True
+        self.pending.append(key)
+        return estimate(), False
+
+    def limit_points(self, series_df, x, y):
+        """Reduce a time series to the point budget before building its figure."""
+        if self.downsample_method == "Sampling (LTTB)":
+            return lttb_time_series(series_df, x, y, self.point_budget), "Sampled"
+        return bucket_time_series(series_df, x, y, self.point_budget)
+
+
+# One dataset handle per content hash, shared by every session and every rerun.
+# The cache file name carries the hash, so it doubles as the cache key.
+@st.cache_resource(max_entries=8)
+def open_dataset(cache_path, name):
+    dataset = Dataset.from_cache(cache_path, name=name)
+    # Approximate mode reads sketches and sample strata; build them in the background
+    # so they are ready before it is first switched on
+    scheduler.submit((dataset.key, 'estimates'), [('estimates', lambda job: dataset.prepare_estimates())])
+    return dataset
+
+# Function to load default data (the workbook is only parsed when its content changes).
+# Rows appended with `python -m pos_analytics append` are folded in as they arrive.
+def load_default_data():
+    dataset = open_dataset(cached_table_path(file_path, sheet_name='superstore_dataset'), file_path)
+    dataset.sync(AppendStore.for_source(file_path))
+    return dataset
+
+# Function to load uploaded files (supports Excel and CSV)
+def load_uploaded_file(uploaded_file):
+    # Hashing a large upload on every click is wasted work, so remember the
+    # cache file for each upload seen in this session
+    converted = st.session_state.setdefault('converted_uploads', {})
+    try:
+        cache_path = converted.get(uploaded_file.file_id)
+        if cache_path is None or not os.path.exists(cache_path):
+            # The upload is streamed into the cache in chunks, so memory stays bounded
+            progress_bar = st.sidebar.progress(0.0, text="Converting upload...")
+            started = time.perf_counter()
+
+            def report_progress(rows, fraction):
+                rate = rows / max(time.perf_counter() - started, 1e-6)
+                progress_bar.progress(min(fraction or 0.0, 1.0), text=f"{rows:,} rows ({rate:,.0f} rows/sec)")
+
+            cache_path = cached_upload_path(uploaded_file.getvalue(), uploaded_file.name, progress=report_progress)
+            converted[uploaded_file.file_id] = cache_path
+            progress_bar.empty()
+        return open_dataset(cache_path, uploaded_file.name)
+    except Exception as e:
+        st.sidebar.error(f"Error loading file: {e}")
+        st.stop()
+
+
+def load_data():
+    """Render the data source picker and return the selected dataset."""
+    # Sidebar for file upload or default dataset
+    st.sidebar.title("Upload or Load Dataset")
+
+    data_source = st.sidebar.radio(
+        "Choose Data Source:",
+        ("Default Dataset", "Upload Your Own Dataset")
+    )
+
+    # Load dataset based on user input
+    if data_source == "Default Dataset":
+        dataset = load_default_data()
+        st.sidebar.success("Default dataset loaded successfully!")
+    else:
+        uploaded_file = st.sidebar.file_uploader("Upload an Excel or CSV file", type=['xlsx', 'csv'])
+
+        if uploaded_file is not None:
+            dataset = load_uploaded_file(uploaded_file)
+            st.sidebar.success("Dataset uploaded successfully!")
+        else:
+            st.sidebar.warning("Please upload a dataset to proceed.")
+            st.stop()
+
+    memory = dataset.memory_report
+    st.sidebar.caption(
+        f"{len(dataset):,} rows in memory: {memory['bytes_after'] / 1e6:,.1f} MB "
+        f"(parsed: {memory['bytes_before'] / 1e6:,.1f} MB), aggregated with {dataset.backend}"
+    )
+    return dataset
+
+
+def start_recorder():
+    """A recorder for this rerun; profiling is on with ``?profile=1`` or the sidebar toggle."""
+    profiling = (
+        st.query_params.get('profile', '').lower() in ('1', 'true', 'yes')
+        or st.session_state.get('profiling', False)
+    )
+    return Recorder(trace_memory=profiling)
+
+
+def search_multiselect(dataset, label, column, **parents):
+    """A sidebar multiselect over the best matches for a search box, not every value.
+
+    Only the matches and the current selection are sent to the browser. ``parents``
+    are the selections of the dimensions above ``column`` (see
+    ``Dataset.options_under``); selected values no longer under them are dropped.
+    """
+    key = f'filter_{column}'
+    selected = st.session_state.get(key, [])
+    within = dataset.options_under(column, **parents) if any(parents.values()) else None
+    if within is not None:
+        allowed = set(within)
+        if any(value not in allowed for value in selected):
+            selected = [value for value in selected if value in allowed]
+            st.session_state[key] = selected
+    total = len(dataset.options(column)) if within is None else len(within)
+
+    query = st.sidebar.text_input(
+        f"Search {label.split()[-1].lower()} ({total:,})", key=f'search_{column}',
+        placeholder="Type part of a name"
+    )
+    matches = dataset.search(column, query, **parents)
+    options = matches + [value for value in selected if value not in matches]
+    return st.sidebar.multiselect(label, options=options, key=key)
+
+
+def build_context(pages, recorder=None):
+    """Render the shared header and sidebar and return the context for the chosen page.
+
+    ``pages`` lists the analysis page labels offered in the sidebar.
+    """
+    with stage('load') as info:
+        dataset = load_data()
+        info['rows'] = len(dataset)
+
+    # Refresh Button
+    if st.button("Refresh Dashboard"):
+        st.query_params.clear()
+
+    # Tooltip Message
+    tooltip_message = (
+        "The dataset is a working process. You cannot open the Excel file directly, "
+        "and no modifications can be made. You can only add data to existing columns, "
+        "and you cannot change the column names."
+    )
+    st.markdown(
+        f'<span style="color: grey; font-size: 12px; text-decoration: underline;">{tooltip_message}</span>',
+        unsafe_allow_html=True
+    )
+
+    # Sidebar configuration
+    st.sidebar.title("Point of Sale Analysis")
+    options = st.sidebar.radio("Select Analysis Type", pages)
+
+    # Sidebar filters
+    st.sidebar.header("Filters")
+
+    # Date filters positioned at the top
+    min_date, max_date = dataset.filters.date_range()
+    start_date = st.sidebar.date_input("Start Date", min_date, min_value=min_date, max_value=max_date)
+    end_date = st.sidebar.date_input("End Date", max_date, min_value=min_date, max_value=max_date)
+
+    # Display an error if the start date is after the end date
+    if start_date > end_date:
+        st.sidebar.error("Start Date cannot be after End Date")
+
+    # Additional filters. Pickers lower in a hierarchy only offer values found under
+    # the selections above them; products and cities are searched rather than listed.
+    category_filter = st.sidebar.multiselect("Select Product Category", options=dataset.options('category'))
+    subcategory_filter = st.sidebar.multiselect(
+        "Select Subcategory", options=dataset.options_under('subcategory', category=category_filter)
+    )
+    product_filter = search_multiselect(
+        dataset, "Select Product", 'product_name', subcategory=subcategory_filter, category=category_filter
+    )
+    region_filter = st.sidebar.multiselect("Select Region", options=dataset.options('region'))
+    state_filter = st.sidebar.multiselect(
+        "Select State", options=dataset.options_under('state', region=region_filter)
+    )
+    city_filter = search_multiselect(dataset, "Select City", 'city', state=state_filter, region=region_filter)
+    segment_filter = st.sidebar.multiselect("Select Segment", options=dataset.options('segment'))
+
+    # Chart settings: cap the points sent to the browser by time-series charts
+    with st.sidebar.expander("Chart Settings"):
+        point_budget = st.number_input(
+            "Max points per time-series chart", min_value=50, max_value=100_000,
+            value=DEFAULT_POINT_BUDGET, step=250
+        )
+        downsample_method = st.radio(
+            "Reduce longer series by", ["Bucket totals (day/week/month)", "Sampling (LTTB)"]
+        )
+        scatter_row_limit = st.number_input(
+            "Max markers per scatter plot (binned above this)", min_value=100, max_value=1_000_000,
+            value=DEFAULT_SCATTER_ROW_LIMIT, step=1000
+        )
+        approximate = st.toggle(
+            "Approximate mode",
+            help="Show totals, distinct counts and scatter plots estimated from samples and "
+                 "sketches first, then replace them with exact values computed in the background"
+        )
+
+    # Filter the dataset based on sidebar selections. The filter engine answers the
+    # spec from precomputed row indexes and remembers recent specs, so an unchanged
+    # filter state costs nothing; rows are only gathered for pages that read them.
+    filter_spec = FilterSpec.build(
+        start=pd.to_datetime(start_date),
+        end=pd.to_datetime(end_date),
+        category=category_filter,
+        region=region_filter,
+        product_name=product_filter,
+        segment=segment_filter,
+        subcategory=subcategory_filter,
+        state=state_filter,
+        city=city_filter,
+    )
+    with stage('filter', rows=len(dataset)) as info:
+        rows = dataset.filters.positions(filter_spec)
+        info['rows_out'] = len(dataset) if rows is None else len(rows)
+
+    return PageContext(
+        page=options,
+        dataset=dataset,
+        filter_spec=filter_spec,
+        point_budget=point_budget,
+        downsample_method=downsample_method,
+        scatter_row_limit=scatter_row_limit,
+        recorder=recorder or Recorder(),
+        approximate=approximate,
+    )
+
+
+def show_run_stats(ctx):
+    """Sidebar footer: cache effectiveness and where this rerun spent its time."""
+    show_refinements(ctx)
+    # Show how much aggregation work the shared cache saved (across all sessions on this dataset)
+    aggregate_stats = ctx.aggregates.stats()
+    st.sidebar.caption(
+        f"Aggregation cache: {aggregate_stats['hits']:,} hits / {aggregate_stats['misses']:,} misses, "
+        f"{aggregate_stats['entries']} results ({aggregate_stats['bytes'] / 1e6:,.2f} MB)"
+    )
+    figure_stats = figure_cache.stats()
+    st.sidebar.caption(
+        f"Figure cache: {figure_stats['hits']:,} hits / {figure_stats['misses']:,} misses, "
+        f"{figure_stats['entries']} figures"
+    )
+    stages = ", ".join(
+        f"{name} {seconds * 1000:,.0f} ms" for name, seconds in ctx.recorder.top_level().items()
+    )
+    st.sidebar.caption(f"Rendered in {ctx.recorder.elapsed() * 1000:,.0f} ms ({stages})")
+    st.sidebar.toggle(
+        "Performance panel", key='profiling',
+        help="Record time, rows, memory and chart payload per stage (also on with ?profile=1)"
+    )
+    if ctx.profiling:
+        show_performance_panel(ctx)
+
+
+def show_refinements(ctx):
+    """Sidebar line while estimates are shown; reruns the page once all are refined."""
+    pending = list(ctx.pending)
+    if not pending:
+        return
+
+    @st.fragment(run_every=0.5)
+    def progress():
+        done = sum(refinements.ready(key) for key in pending)
+        if done == len(pending):
+            st.rerun()
+        st.caption(f"Showing estimates: {done}/{len(pending)} exact values ready")
+
+    with st.sidebar:
+        progress()
+
+
+def show_performance_panel(ctx):
+    """A collapsible table of this rerun's stages; the run is also appended to PROFILE_LOG."""
+    recorder = ctx.recorder
+    elapsed = recorder.elapsed()
+    recorder.export(
+        PROFILE_LOG, page=ctx.page, dataset=ctx.dataset.name, rows=len(ctx.dataset),
+        filters=repr(ctx.filter_spec),
+    )
+    records = recorder.records()
+    table = pd.DataFrame({
+        'stage': ['\u2003' * record['depth'] + record['stage'] for record in records],
+        'ms': [record.get('seconds', 0) * 1000 for record in records],
+        'rows in': [record.get('rows') for record in records],
+        'rows out': [record.get('rows_out') for record in records],
+        'peak MB': [record.get('peak_bytes', 0) / 1e6 for record in records],
+        'payload KB': [record.get('payload_bytes', 0) / 1e3 for record in records],
+        'cached': [record.get('cached') for record in records],
+    })
+    recorded = sum(recorder.top_level().values())
+    with st.expander(f"Performance: {elapsed * 1000:,.0f} ms this rerun"):
+        st.dataframe(table, hide_index=True, use_container_width=True)
+        st.caption(
+            f"{(elapsed - recorded) * 1000:,.0f} ms went to widgets and layout outside the recorded "
+            f"stages. Memory is traced while profiling, which slows reruns down. "
+            f"Every profiled rerun is appended to {PROFILE_LOG}."
+        )
+        st.download_button(
+            "Download this rerun (JSON)", json.dumps(records, default=str, indent=2),
+            file_name='rerun-profile.json', mime='application/json'
+        )
@@ -0,0 +1,25 @@
+"""Analysis pages, one module each, imported only when first shown.
+
+Every module exposes ``render(ctx)``, which draws the page from a ``PageContext``,
+and ``warm(ctx)``, which computes the aggregates and figures of the page's default
+view into the shared caches without calling Streamlit, so that it can run on a
+background thread.
+"""
+
+import importlib
+
+# Sidebar label -> module in this package, in sidebar order
+PAGES = {
+    "Overall Overview": 'overview',
+    "Sales by Product Category": 'category',
+    "Daily & Hourly Sales Trend": 'trend',
+    "Customer Sales Analytics": 'customers',
+    "Inventory Turnover Rate": 'inventory',
+    "Profit Margin by Product and Category": 'margin',
+    "Discount Effectiveness Analysis": 'discount',
+}
+
+
+def load(page):
+    """The module rendering ``page``; Python imports it on first use only."""
+    return importlib.import_module(f'{__name__}.{PAGES[page]}')
@@ -0,0 +1,80 @@
+import streamlit as st
+
+from pos_analytics import analyses, px_figure
+
+
+def render(ctx):
+    """Customer Sales Analytics: top customers and one customer's purchases."""
+    dataset, limit_points = ctx.dataset, ctx.limit_points
+    # Drilldowns and totals come from the customer index rather than scans of the rows
+    customers = dataset.customers
+
+    st.header("Customer Sales Analytics")
+
+    # Show Total Number of Customers
+    total_customers = len(customers.rollups)
+    st.subheader(f"Total Number of Customers: {total_customers}")
+
+    # Display top 5 customers by profit
+    st.subheader("Top 5 Customers by Profit")
+    top_customers = analyses.top_customers(dataset)
+    st.dataframe(top_customers)
+    if ctx.row_count == 0:
+        st.warning("No data available for the selected date range.")
+    else:
+        # Select a customer among the best matches for the search box, so the
+        # browser is never sent the full customer list
+        rows = ctx.rows
+        query = st.text_input("Search customers", placeholder="Type part of a name")
+        matches = dataset.search('customer', query, spec=ctx.filter_spec)
+        if not matches:
+            st.warning(f"No customer in the selected data matches {query!r}.")
+            return
+        selected_customer = st.selectbox("Select Customer", options=matches)
+        customer_data = customers.drilldown(selected_customer, within=rows)
+
+        st.subheader(f"Sales for Customer: {selected_customer}")
+        lifetime = customers.rollups.loc[selected_customer]
+        st.caption(
+            f"Lifetime: {lifetime['sales']:,.2f} sales, {lifetime['profit']:,.2f} profit, "
+            f"{lifetime['orders']:,} orders from {lifetime['first_order']:%Y-%m-%d} "
+            f"to {lifetime['last_order']:%Y-%m-%d}"
+        )
+
+        # Display table for customer purchase details
+        st.write("Purchase Details")
+        st.dataframe(customer_data[['order_date', 'product_name', 'sales', 'quantity']])
+
+        for fig in customer_figures(customer_data, selected_customer, limit_points):
+            ctx.plot(fig)
+
+
+def warm(ctx):
+    """Compute this page's tables and figures into the shared caches.
+
+    The figures are those of the customer offered first while the search box is empty.
+    """
+    dataset = ctx.dataset
+    analyses.top_customers(dataset)
+    if ctx.row_count == 0:
+        return
+    matches = dataset.search('customer', '', spec=ctx.filter_spec)
+    if matches:
+        rows = ctx.rows
+        customer_data = dataset.customers.drilldown(matches[0], within=rows)
+        customer_figures(customer_data, matches[0], ctx.limit_points)
+
+
+def customer_figures(customer_data, customer, limit_points):
+    """Sales by product and over time for one customer's purchases."""
+    # Visualize sales by product for this customer
+    product_sales = customer_data.groupby('product_name', observed=True)['sales'].sum().reset_index()
+    by_product = px_figure('bar', product_sales, y='product_name', x='sales',
+                           title=f'Sales by Product for {customer}')
+
+    # Visualize purchase history over time for this customer
+    sales_over_time = customer_data.groupby('order_date', observed=True)['sales'].sum().reset_index()
+    sales_over_time, _ = limit_points(sales_over_time, 'order_date', 'sales')
+    over_time = px_figure('line', sales_over_time, x='order_date', y='sales',
+                          title=f'Sales Over Time for {customer}', markers=True)
+    return by_product, over_time
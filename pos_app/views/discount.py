@@ -0,0 +1,187 @@
+import streamlit as st
+import plotly.express as px
+import plotly.graph_objects as go
+
+from pos_analytics import analyses, cached_figure, px_figure
+from pos_analytics.discounts import DISCOUNT_EDGES
+
+# Edges (in percent) offered for the discount ranges
+EDGE_OPTIONS = list(range(0, 101, 5))
+
+# Axes shared by the discount vs. profit margin scatter plot and heatmap
+DISCOUNT_MARGIN_LAYOUT = dict(
+    xaxis_title='Discount (%)',
+    yaxis_title='Profit Margin',
+    title_x=0.5,
+    template='plotly_dark'
+)
+
+
+def render(ctx):
+    """Discount Effectiveness Analysis: how discounts move sales, profit and margins."""
+    dataset, filter_spec, row_count = ctx.dataset, ctx.filter_spec, ctx.row_count
+    scatter_row_limit = ctx.scatter_row_limit
+
+    st.header("Discount Effectiveness Analysis")
+
+    # Show overall discount impact (if no filter is applied)
+    st.write("### Overall Discount Strategy Impact on Sales and Profit")
+    ctx.plot(overall_figure(analyses.discount_impact(dataset)))
+
+    # 2. Discount vs. Profit Margin (Scatter Plot)
+    # Rows are only gathered when few enough to draw one marker each
+    binned = False
+    scatter_rows = None
+    if row_count > scatter_row_limit:
+        # In approximate mode a sample is drawn while the full binning runs
+        discount_margin_bins, binned = ctx.estimate_first(
+            'discount_margin_bins',
+            lambda: analyses.discount_margin_bins(dataset, filter_spec),
+            lambda: None,
+        )
+        if not binned:
+            # Every discount level keeps its share of the markers
+            sample = dataset.sample(filter_spec, scatter_row_limit, strata=['discount'])
+            scatter_rows = sample.rows
+            st.caption(
+                f"Stratified sample of {len(scatter_rows):,} of {row_count:,} transactions "
+                f"(by discount level) until the full binning is ready"
+            )
+    if not binned:
+        fig_discount_profit_margin = margin_scatter(ctx.filtered_df if scatter_rows is None else scatter_rows)
+    else:
+        fig_discount_profit_margin = margin_heatmap(discount_margin_bins)
+        st.caption(f"{row_count:,} transactions binned into {len(discount_margin_bins):,} cells")
+    ctx.plot(fig_discount_profit_margin)
+
+    # 3. Sales and Profit Trends by Discount Range (Box Plot)
+    # Ranges are merged from per-percent histograms, so changing the edges is cheap
+    edges = sorted(st.multiselect("Discount range edges (%)", EDGE_OPTIONS, default=DISCOUNT_EDGES))
+    if len(edges) < 2:
+        st.warning("Pick at least two edges to define a discount range.")
+        edges = DISCOUNT_EDGES
+    ctx.plot(ranges_figure(analyses.discount_ranges(dataset, filter_spec, edges=edges)))
+
+    # Aggregate data by 'category', 'product_name', and 'discount'
+    ctx.plot(product_margin_figure(analyses.discount_product_margins(dataset, filter_spec)))
+
+
+def warm(ctx):
+    """Compute this page's analyses and figures (default edges) into the shared caches."""
+    dataset, filter_spec = ctx.dataset, ctx.filter_spec
+    overall_figure(analyses.discount_impact(dataset))
+    if ctx.row_count > ctx.scatter_row_limit:
+        margin_heatmap(analyses.discount_margin_bins(dataset, filter_spec))
+    else:
+        margin_scatter(ctx.filtered_df)
+    ranges_figure(analyses.discount_ranges(dataset, filter_spec, edges=sorted(DISCOUNT_EDGES)))
+    product_margin_figure(analyses.discount_product_margins(dataset, filter_spec))
+
+
+def overall_figure(overall_discount_impact):
+    """Sales and profit by discount over every row."""
+    return px_figure('line', overall_discount_impact, x='discount', y=['sales', 'profit'],
+                     title="Overall Sales and Profit by Discount",
+                     labels={'sales': 'Total Sales', 'profit': 'Total Profit'},
+                     markers=True,
+                     traces=[
+                         dict(mode='lines+markers'),
+                         # Customize colors for the lines
+                         dict(line=dict(color='blue'), selector=dict(name='sales')),
+                         dict(line=dict(color='red'), selector=dict(name='profit')),
+                         # Add hover data to display detailed information
+                         dict(
+                             hovertemplate='Discount: %{x}<br>Sales: %{y}<br>Profit: %{customdata[1]}<extra></extra>',
+                             customdata=overall_discount_impact[['discount', 'profit']].values
+                         ),
+                     ],
+                     layout=dict(
+                         xaxis_title='Discount',
+                         yaxis_title='Amount',
+                         legend_title='Metrics'
+                     ))
+
+
+def margin_scatter(scatter_rows):
+    """One marker per transaction: discount vs. profit margin, sized by sales."""
+    return px_figure(
+        'scatter',
+        scatter_rows[['discount', 'profit_margin', 'sales']],
+        x='discount',
+        y='profit_margin',
+        size='sales',
+        color='profit_margin',
+        title='Discount vs. Profit Margin',
+        labels={'discount': 'Discount (%)', 'profit_margin': 'Profit Margin'},
+        color_continuous_scale=px.colors.diverging.RdYlGn,
+        size_max=20,
+        layout=DISCOUNT_MARGIN_LAYOUT
+    )
+
+
+def margin_heatmap(discount_margin_bins):
+    """Sales per discount x profit margin cell, for too many transactions to draw one each.
+
+    The bins are computed on the server, so the figure size stays bounded.
+    """
+    def build_discount_margin_heatmap():
+        figure = go.Figure(go.Heatmap(
+            x=discount_margin_bins['discount'],
+            y=discount_margin_bins['profit_margin'],
+            z=discount_margin_bins['sales'],
+            customdata=discount_margin_bins['rows'],
+            colorscale='Viridis',
+            colorbar={'title': 'Total Sales'},
+            hovertemplate='Discount: %{x:.2f}<br>Profit Margin: %{y:.2f}<br>'
+                          'Sales: %{z:,.2f}<br>Transactions: %{customdata:,}<extra></extra>'
+        ))
+        figure.update_layout(title='Discount vs. Profit Margin (Sales by Bin)', **DISCOUNT_MARGIN_LAYOUT)
+        return figure
+
+    return cached_figure(
+        ('discount_margin_heatmap', discount_margin_bins, DISCOUNT_MARGIN_LAYOUT),
+        build_discount_margin_heatmap
+    )
+
+
+def ranges_figure(discount_range_sales_profit):
+    """Sales and profit side by side per discount range."""
+    return px_figure(
+        'bar',
+        discount_range_sales_profit,
+        x='discount_range',
+        y=['sales', 'profit'],
+        title='Sales and Profit by Discount Range',
+        labels={'discount_range': 'Discount Range', 'value': 'Amount', 'variable': 'Metrics'},
+        color_discrete_sequence=px.colors.qualitative.T10,
+        barmode='group',
+        layout=dict(
+            xaxis_title='Discount Range',
+            yaxis_title='Amount',
+            title_x=0.5,
+            template='plotly_dark'
+        )
+    )
+
+
+def product_margin_figure(discount_analysis):
+    """Scatter Plot: Discount vs. Profit Margin by Product Category."""
+    return px_figure(
+        'scatter',
+        discount_analysis,
+        x='discount',
+        y='profit_margin',
+        color='category',
+        size=discount_analysis['sales'].abs(),  # Absolute value for size
+        title="Discount vs Profit Margin by Product Category",
+        labels={'discount': 'Discount (%)', 'profit_margin': 'Profit Margin'},
+        hover_name='product_name',
+        size_max=20,
+        color_discrete_sequence=px.colors.qualitative.Set1,
+        layout=dict(
+            xaxis_title='Discount (%)',
+            yaxis_title='Profit Margin',
+            title_x=0.5,
+            template='plotly_dark'
+        )
+    )
@@ -0,0 +1,87 @@
+import streamlit as st
+
+from pos_analytics import RANK_METRICS, analyses, px_figure
+
+# Default and upper bound of the product count input
+DEFAULT_PRODUCTS = 5
+MAX_PRODUCTS = 100
+
+
+def render(ctx):
+    """Inventory Turnover Rate: top and bottom products and turnover by category."""
+    dataset, filter_spec = ctx.dataset, ctx.filter_spec
+
+    # Radio button to select Top or Bottom view, and how many products to list
+    view_type = st.radio("Select View Type:", options=["Top", "Bottom"])
+    count = st.number_input("Number of products:", min_value=1, max_value=MAX_PRODUCTS, value=DEFAULT_PRODUCTS, step=1)
+
+    # Radio button to select the metric to sort by
+    sort_metric = st.radio(
+        "Sort by:",
+        options=RANK_METRICS,
+        format_func=lambda metric: metric.replace('_', ' ').capitalize(),
+    )
+
+    # Products ranked by their totals over the filtered rows
+    product_table = analyses.product_rankings(
+        dataset, filter_spec, sort_metric, n=int(count), bottom=view_type == "Bottom"
+    )
+
+    # Display the resulting table
+    st.subheader(f"{view_type} {int(count)} Products by {sort_metric.replace('_', ' ').capitalize()}")
+    st.write(product_table)
+
+
+    # 2. Inventory Turnover Rate Analysis
+    st.header("Inventory Turnover Rate Analysis")
+
+    for figure in figures(dataset, filter_spec):
+        ctx.plot(figure)
+
+
+def warm(ctx):
+    """Compute this page's analyses and figures (default view) into the shared caches."""
+    analyses.product_rankings(ctx.dataset, ctx.filter_spec, RANK_METRICS[0], n=DEFAULT_PRODUCTS)
+    figures(ctx.dataset, ctx.filter_spec)
+
+
+def figures(dataset, filter_spec):
+    """The page's turnover figures in drawing order."""
+    # Calculate inventory turnover rate by category
+    category_turnover = analyses.inventory_turnover(dataset, filter_spec)
+
+    # Bar chart for Inventory Turnover Rate by Product Category
+    fig_turnover = px_figure(
+        'bar',
+        category_turnover,
+        x='category',
+        y='turnover_rate',
+        title='Inventory Turnover Rate by Product Category',
+        labels={'category': 'Product Category', 'turnover_rate': 'Inventory Turnover Rate'},
+        color='category'
+    )
+
+
+    # Quality (Quantity) vs. Sales/Profit by Category
+    fig_quality_sales = px_figure(
+        'scatter',
+        category_turnover,
+        x='quantity',
+        y='sales',
+        color='category',
+        size='sales',
+        title="Quality (Quantity) vs Sales by Product Category",
+        labels={'quantity': 'Quality (Quantity)', 'sales': 'Total Sales'},
+    )
+
+    fig_quality_profit = px_figure(
+        'scatter',
+        category_turnover,
+        x='quantity',
+        y='profit',
+        color='category',
+        size='profit',
+        title="Quality (Quantity) vs Profit by Product Category",
+        labels={'quantity': 'Quality (Quantity)', 'profit': 'Total Profit'},
+    )
+    return [fig_turnover, fig_quality_sales, fig_quality_profit]
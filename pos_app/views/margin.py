@@ -0,0 +1,154 @@
+import streamlit as st
+import plotly.express as px
+
+from pos_analytics import analyses, px_figure
+
+
+def render(ctx):
+    """Profit Margin by Product and Category: margins per product and category."""
+    dataset, filter_spec = ctx.dataset, ctx.filter_spec
+
+    st.header("Profit Margin Analysis by Product and Category")
+
+    # Radio button to toggle between Top and Bottom 5 products by Profit Margin
+    view_type = st.radio("Select View Type:", options=["Top 5", "Bottom 5"])
+
+    # Determine top or bottom 5 products based on profit margin
+    top_bottom_products = analyses.product_margin_extremes(
+        dataset, filter_spec, n=5, bottom=view_type == "Bottom 5"
+    )
+
+    # Display the resulting table with category, product name, sales, profit, and profit margin
+    st.subheader(f"{view_type} Products by Profit Margin")
+    st.write(top_bottom_products)
+
+    for figure in figures(dataset, filter_spec):
+        ctx.plot(figure)
+
+
+def warm(ctx):
+    """Compute this page's analyses and figures (Top 5 view) into the shared caches."""
+    analyses.product_margin_extremes(ctx.dataset, ctx.filter_spec, n=5, bottom=False)
+    figures(ctx.dataset, ctx.filter_spec)
+
+
+def figures(dataset, filter_spec):
+    """The page's figures in drawing order."""
+    # Group data by 'category' and 'product_name' to calculate aggregate metrics
+    product_category_margin = analyses.product_margins(dataset, filter_spec)
+
+    # Scatter plot: Profit Margin vs Sales by Product Category
+    fig_margin_sales = px_figure(
+        'scatter',
+        product_category_margin,
+        x='profit_margin',
+        y='sales',
+        color='category',
+        size=product_category_margin['sales'].abs(),  # Absolute values to avoid negative sizes
+        title="Profit Margin vs Sales by Product Category",
+        labels={'profit_margin': 'Profit Margin', 'sales': 'Total Sales'},
+        hover_name='product_name',
+        layout=dict(
+            xaxis_title='Profit Margin',
+            yaxis_title='Total Sales',
+            title_x=0.5,
+            template='plotly_dark'
+        )
+    )
+
+    # Scatter plot: Profit Margin vs Profit by Product Category
+    fig_margin_profit = px_figure(
+        'scatter',
+        product_category_margin,
+        x='profit_margin',
+        y='profit',
+        color='category',
+        size=product_category_margin['profit'].abs(),  # Absolute values for size
+        title="Profit Margin vs Profit by Product Category",
+        labels={'profit_margin': 'Profit Margin', 'profit': 'Total Profit'},
+        hover_name='product_name',
+        layout=dict(
+            xaxis_title='Profit Margin',
+            yaxis_title='Total Profit',
+            title_x=0.5,
+            template='plotly_dark'
+        )
+    )
+
+    # Bar Chart: Total Sales by Product Category
+    fig_sales_bar = px_figure(
+        'bar',
+        product_category_margin,
+        x='category',
+        y='sales',
+        color='category',
+        title="Total Sales by Product Category",
+        labels={'category': 'Product Category', 'sales': 'Total Sales'},
+        hover_name='product_name',
+        layout=dict(
+            xaxis_title='Product Category',
+            yaxis_title='Total Sales',
+            title_x=0.5,
+            template='plotly_dark'
+        )
+    )
+
+    # Bar Chart: Total Profit by Product Category
+    fig_profit_bar = px_figure(
+        'bar',
+        product_category_margin,
+        x='category',
+        y='profit',
+        color='category',
+        title="Total Profit by Product Category",
+        labels={'category': 'Product Category', 'profit': 'Total Profit'},
+        hover_name='product_name',
+        layout=dict(
+            xaxis_title='Product Category',
+            yaxis_title='Total Profit',
+            title_x=0.5,
+            template='plotly_dark'
+        )
+    )
+
+    # Bar Chart: Average Profit Margin by Product Category
+    fig_margin_bar = px_figure(
+        'bar',
+        product_category_margin,
+        x='category',
+        y='profit_margin',
+        color='category',
+        title="Average Profit Margin by Product Category",
+        labels={'category': 'Product Category', 'profit_margin': 'Average Profit Margin'},
+        hover_name='product_name',
+        layout=dict(
+            xaxis_title='Product Category',
+            yaxis_title='Average Profit Margin',
+            title_x=0.5,
+            template='plotly_dark'
+        )
+    )
+    # Aggregate yearly sales and profit by product category
+    yearly_category_sales_profit = analyses.yearly_category_trend(dataset, filter_spec)
+
+    # Chart 2: Yearly Profit by Product Category
+    fig_yearly_profit = px_figure(
+        'line',
+        yearly_category_sales_profit,
+        x='year',
+        y='profit',
+        color='category',
+        title='Yearly Profit by Product Category',
+        labels={'year': 'Year', 'profit': 'Total Profit'},
+        markers=True,
+        color_discrete_sequence=px.colors.qualitative.T10,
+        layout=dict(
+            xaxis_title='Year',
+            yaxis_title='Total Profit',
+            title_x=0.5,
+            template='plotly_dark'
+        )
+    )
+    return [
+        fig_margin_sales, fig_margin_profit, fig_sales_bar, fig_profit_bar, fig_margin_bar, fig_yearly_profit
+    ]
@@ -0,0 +1,159 @@
+import streamlit as st
+import plotly.express as px
+
+from pos_analytics import analyses, gauge_figure, px_figure
+
+# Rows shown by the stratified option of "View Data Sample"
+SAMPLE_ROWS = 100
+
+
+def render(ctx):
+    """Overall Overview: headline gauges and per-region sales and margins."""
+    dataset, filter_spec = ctx.dataset, ctx.filter_spec
+
+    st.header("Overall Business Overview")
+
+    # Overall metrics; in approximate mode they are estimated from a stratified
+    # sample until the exact totals are ready
+    totals, exact = ctx.estimate_first(
+        'kpis',
+        lambda: analyses.kpis(dataset, filter_spec),
+        lambda: analyses.kpi_estimates(dataset, filter_spec),
+    )
+    fig_sales, fig_profit, fig_quantity, fig_margin, fig_rows = gauges(totals)
+
+    # Creating a grid for the gauge charts (3 charts per row)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        ctx.plot(fig_sales, use_container_width=True)
+
+    with col2:
+        ctx.plot(fig_profit, use_container_width=True)
+
+    with col3:
+        ctx.plot(fig_quantity, use_container_width=True)
+
+
+    # Second row of metrics
+    col4, col5, col6 = st.columns(3)
+    with col4:
+        ctx.plot(fig_margin, use_container_width=True)
+
+    with col5:
+        ctx.plot(fig_rows, use_container_width=True)
+
+    with col6:
+        distinct, exact_distinct = ctx.estimate_first(
+            'distinct',
+            lambda: analyses.distinct_counts(dataset, filter_spec),
+            lambda: analyses.distinct_count_estimates(dataset, filter_spec),
+        )
+        about = "" if exact_distinct else "\u2248"
+        st.metric("Distinct Customers", f"{about}{distinct['customer'].iloc[0]:,}")
+        st.metric("Distinct Products", f"{about}{distinct['product_name'].iloc[0]:,}")
+
+    if not exact:
+        ci = totals.iloc[0]
+        st.caption(
+            f"Estimated from a stratified sample (95% confidence): sales \u00b1 {ci['sales_ci']:,.0f}, "
+            f"profit \u00b1 {ci['profit_ci']:,.0f}, quantity \u00b1 {ci['quantity_ci']:,.0f}, "
+            f"margin \u00b1 {ci['profit_margin_pct_ci']:.2f} points. Exact values replace them when ready."
+        )
+
+    fig1, fig2 = region_figures(dataset)
+
+    # First Plot: Total Sales by Region
+    st.subheader("Total Sales by Region")
+
+    # Display the plot in Streamlit
+    ctx.plot(fig1)
+
+    # Second Plot: Average Profit Margin by Region
+    st.subheader("Average Profit Margin by Region")
+
+    # Display the plot in Streamlit
+    ctx.plot(fig2)
+
+    # Display first or last 5 rows of the data as a sample
+    sample_data = st.radio("View Data Sample", ["First 5 rows", "Last 5 rows", "Stratified sample"])
+    if sample_data == "First 5 rows":
+        st.dataframe(ctx.head())
+    elif sample_data == "Last 5 rows":
+        st.dataframe(ctx.tail())
+    else:
+        # Rows drawn from every region and category in proportion to their size
+        sample = dataset.sample(filter_spec, SAMPLE_ROWS)
+        st.dataframe(sample.rows)
+        sales, sales_ci = sample.total('sales')
+        st.caption(
+            f"{len(sample.rows):,} of {sample.population:,} rows, drawn per region and category. "
+            f"Sales estimated from them: {sales:,.0f} \u00b1 {sales_ci:,.0f} (95% confidence)"
+        )
+
+
+def warm(ctx):
+    """Compute this page's analyses and figures (exact totals) into the shared caches."""
+    gauges(analyses.kpis(ctx.dataset, ctx.filter_spec))
+    analyses.distinct_counts(ctx.dataset, ctx.filter_spec)
+    region_figures(ctx.dataset)
+
+
+def gauges(totals):
+    """Gauges for sales, profit, quantity, profit margin and rows, in that order."""
+    return [
+        gauge_figure(totals['sales'].iloc[0], "Total Sales", "darkblue"),
+        gauge_figure(totals['profit'].iloc[0], "Total Profit", "green"),
+        gauge_figure(totals['quantity'].iloc[0], "Total Quantity Sold", "purple"),
+        gauge_figure(totals['profit_margin_pct'].iloc[0], "Average Profit Margin (%)", "red"),
+        gauge_figure(totals['count'].iloc[0], "Total Number of Rows", "teal"),
+    ]
+
+
+def region_figures(dataset):
+    """Total sales and average profit margin by region (over every row)."""
+    # Aggregate total sales by region
+    total_sales_by_region = analyses.region_sales(dataset)
+
+    # Create a Plotly bar chart for total sales by region
+    fig1 = px_figure('bar', total_sales_by_region,
+                     x='region',
+                     y='sales',
+                     title='Total Sales by Region',
+                     labels={'region': 'Region', 'sales': 'Total Sales'},
+                     color='region',  # Color by region for better distinction
+                     color_discrete_sequence=px.colors.qualitative.T10,
+                     layout=dict(
+                         xaxis_title='Region',
+                         yaxis_title='Total Sales',
+                         title_x=0.5,
+                         template='plotly_white',
+                         width=700,
+                         height=500,
+                         plot_bgcolor='rgba(0,0,0,0)',  # Transparent plot background
+                         paper_bgcolor='rgba(0,0,0,0)'  # Transparent overall background
+                     )
+    )
+
+    # Calculate average profit margin by region
+    avg_profit_margin_by_region = analyses.region_profit_margin(dataset)
+
+    # Create a Plotly bar chart for average profit margin by region
+    fig2 = px_figure('bar', avg_profit_margin_by_region,
+                     x='region',
+                     y='profit_margin',
+                     title='Average Profit Margin by Region',
+                     labels={'region': 'Region', 'profit_margin': 'Average Profit Margin'},
+                     color='region',  # Color by region for better distinction
+                     color_discrete_sequence=px.colors.qualitative.T10,
+                     layout=dict(
+                         xaxis_title='Region',
+                         yaxis_title='Average Profit Margin',
+                         title_x=0.5,
+                         template='plotly_white',
+                         width=700,
+                         height=500,
+                         plot_bgcolor='rgba(0,0,0,0)',  # Transparent plot background
+                         paper_bgcolor='rgba(0,0,0,0)'  # Transparent overall background
+                     )
+    )
+    return fig1, fig2
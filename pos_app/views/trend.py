@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from pos_analytics import RESOLUTIONS, analyses, px_figure
+
+# Moving averages offered as overlays on the day-wise chart, by window in days
+AVERAGE_OVERLAYS = {"7-day average": 7, "30-day average": 30, "90-day average": 90}
+LAST_YEAR_OVERLAY = "Same period last year"
+OVERLAY_COLORS = ["#FFC300", "#2ECC71", "#9B59B6", "#1E90FF"]
+
+# Period-over-period tables offered under the day-wise chart
+COMPARISONS = {"Month": 'M', "Quarter": 'Q', "Year": 'Y'}
+
+
+def overlay_lines(series, overlays, resolution):
+    """Overlay values at the chart's resolution, read off the series' prefix sums.
+
+    Moving averages are daily, so on a bucketed chart they are summed per bucket
+    like the sales are; the last-year line is the same bucket a year earlier.
+    """
+    freq = {label: alias for alias, label, _ in RESOLUTIONS}.get(resolution, 'D')
+    averages = [label for label in overlays if label in AVERAGE_OVERLAYS]
+    values = np.array([series.rolling_mean(AVERAGE_OVERLAYS[label], partial=True)[0] for label in averages])
+    sums, starts = series.resample(values.reshape(len(averages), len(series.days)), freq)
+    lines = pd.DataFrame(dict(zip(averages, sums)), index=starts.rename('day'))
+    if LAST_YEAR_OVERLAY in overlays:
+        lines[LAST_YEAR_OVERLAY] = series.periods(freq)['last_year'].to_numpy()
+    return lines[list(overlays)].reset_index()
+
+
+def daily_figure(sales_over_time, overlays=()):
+    """Sales per day (or per bucket), with the chosen overlay lines."""
+    return px_figure(
+        'line',
+        sales_over_time,
+        x='day',
+        y=['sales', *overlays] if overlays else 'sales',
+        title="Sales Over Time (Day-wise)",
+        markers=True,
+        color_discrete_sequence=["#FF5733", *OVERLAY_COLORS] if overlays else ["#FF5733"],
+        traces=[dict(line=dict(width=2.5))],
+        layout=dict(xaxis_title="Date", yaxis_title="Sales", template="plotly_dark")
+    )
+
+
+def hourly_figure(sales_over_time):
+    """Sales per hour of the day."""
+    return px_figure(
+        'line',
+        sales_over_time,
+        x='hour',
+        y='sales',
+        title="Sales Over Time (Hour-wise)",
+        markers=True,
+        color_discrete_sequence=["#1E90FF"],
+        traces=[dict(line=dict(width=2.5))],
+        layout=dict(xaxis_title="Hour", yaxis_title="Sales", template="plotly_dark")
+    )
+
+
+def warm(ctx):
+    """Compute this page's analyses and figures into the shared caches.
+
+    Both charts are built as first shown: day-wise without overlays, hour-wise
+    with every hour selected.
+    """
+    dataset, filter_spec = ctx.dataset, ctx.filter_spec
+    if analyses.kpis(dataset, filter_spec)['count'].iloc[0] == 0:
+        return
+    sales_over_time, _ = ctx.limit_points(analyses.daily_sales(dataset, filter_spec), 'day', 'sales')
+    daily_figure(sales_over_time)
+    hourly_figure(analyses.hourly_sales(dataset, filter_spec))
+
+
+def render(ctx):
+    """Daily & Hourly Sales Trend: sales over days or hours of the day."""
+    dataset, filter_spec, limit_points = ctx.dataset, ctx.filter_spec, ctx.limit_points
+
+    st.header("Daily and Hourly Sales Trend")
+
+    # Select visualization level (day-wise or hour-wise)
+    time_visualization = st.radio("Select Time-based Visualization", ("Day-wise", "Hour-wise"))
+
+    # Total sales calculation
+    totals = analyses.kpis(dataset, filter_spec)
+    total_sales = totals['sales'].iloc[0]
+    st.subheader(f"Total Sales: ${total_sales:,.2f}")
+
+    # If no data available
+    if totals['count'].iloc[0] == 0:
+        st.warning("No data available for the selected filters.")
+    else:
+        if time_visualization == "Day-wise":
+            # Day-wise Sales
+            overlays = st.multiselect("Overlays", [*AVERAGE_OVERLAYS, LAST_YEAR_OVERLAY])
+            sales_by_day = analyses.daily_sales(dataset, filter_spec)
+            sales_over_time, resolution = limit_points(sales_by_day, 'day', 'sales')
+            if len(sales_over_time) < len(sales_by_day):
+                st.caption(f"{resolution}: {len(sales_by_day):,} days shown as {len(sales_over_time):,} points")
+            if overlays:
+                series = analyses.time_series(dataset, filter_spec)
+                sales_over_time = sales_over_time.merge(
+                    overlay_lines(series, overlays, resolution), on='day', how='left'
+                )
+
+            fig_time = daily_figure(sales_over_time, overlays)
+
+        else:
+            # Hour-wise Sales
+            sales_over_time = analyses.hourly_sales(dataset, filter_spec)
+            hours = sales_over_time['hour'].tolist()
+            selected_hours = st.sidebar.multiselect("Select Hours", options=hours, default=hours)
+
+            # Keep only the selected hours
+            if selected_hours:
+                sales_over_time = sales_over_time[sales_over_time['hour'].isin(selected_hours)]
+
+            # Calculate total sales again after hour filter
+            total_sales_hour = sales_over_time['sales'].sum()
+            st.subheader(f"Total Sales for Selected Hours: ${total_sales_hour:,.2f}")
+
+            fig_time = hourly_figure(sales_over_time)
+
+        # Display the line chart
+        ctx.plot(fig_time)
+
+        if time_visualization == "Day-wise":
+            comparison = st.selectbox("Compare periods", ["None", *COMPARISONS])
+            if comparison != "None":
+                periods = analyses.period_over_period(dataset, filter_spec, freq=COMPARISONS[comparison])
+                st.dataframe(
+                    periods.drop(columns='days').iloc[::-1],
+                    hide_index=True,
+                    column_config={
+                        'period': st.column_config.DateColumn(comparison),
+                        'change_pct': st.column_config.NumberColumn("Change %", format="%.1f%%"),
+                        'yoy_pct': st.column_config.NumberColumn("Year-over-year %", format="%.1f%%"),
+                    },
+                )
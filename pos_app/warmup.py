@@ -0,0 +1,59 @@
+"""Background warm-up of the analysis pages' aggregates and figures."""
+
+import streamlit as st
+
+from pos_analytics.warmup import scheduler
+
+from .views import PAGES, load
+
+
+def start_warmup(ctx):
+    """Warm every page's aggregates and figures in the background for the current state.
+
+    Each task calls a page module's ``warm(ctx)``, which computes the page's default
+    view into the shared caches without calling Streamlit, so nothing runs outside a
+    script run. Every page is warmed, whichever one the session is showing, because a
+    job is shared by all sessions asking for the same key; the page already drawn is
+    answered from the caches at once. A warm-up is keyed on the dataset version, the
+    filters and the chart settings; when any of them change, this session's previous
+    warm-up is cancelled.
+    """
+    dataset = ctx.dataset
+    key = (
+        dataset.key, dataset.version, dataset.backend, ctx.filter_spec,
+        ctx.point_budget, ctx.downsample_method, ctx.scatter_row_limit,
+    )
+    job = st.session_state.get('warmup')
+    if job is not None and job.key == key and not job.cancelled:
+        return job
+    if job is not None:
+        job.cancel()
+
+    def warm(page):
+        def task(job):
+            load(page).warm(ctx)
+        return task
+
+    # Pages in sidebar order
+    tasks = [(page, warm(page)) for page in PAGES]
+    job = scheduler.submit(key, tasks)
+    st.session_state['warmup'] = job
+    return job
+
+
+def show_warmup_progress(job):
+    """Sidebar line with the warm-up's progress, refreshed every second until it ends."""
+    @st.fragment(run_every=None if job.progress()['finished'] else 1.0)
+    def progress():
+        state = job.progress()
+        if state['cancelled'] and not state['finished']:
+            return
+        if state['finished']:
+            failed = f", {len(state['errors'])} failed" if state['errors'] else ""
+            st.caption(f"Pages warmed: {state['done']}/{state['total']} in {state['seconds']:,.1f} s{failed}")
+        else:
+            current = f" ({state['current']})" if state['current'] else ""
+            st.caption(f"Warming pages: {state['done']}/{state['total']}{current}")
+
+    with st.sidebar:
+        progress()